@@ -0,0 +1,351 @@
+"""
+Headless batch summarization for large collections of PDFs.
+
+Examples:
+    python batch_summarize.py /data/filings "/data/scans/**/*.pdf" --output summaries.jsonl --workers 8
+    python batch_summarize.py /data/filings --output summaries.parquet
+
+Completed documents are recorded (by SHA-256 of their bytes and the summarization options)
+in a manifest next to the output file, so an interrupted run picks up where it stopped when
+started again, and a run with different options summarizes the documents again.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# Options that change the summary; a document is done only for the options it was summarized with.
+SUMMARY_OPTIONS = ('min_length', 'max_length', 'hierarchical', 'extractive_budget', 'translate', 'quantize')
+# Times a document is submitted when worker processes die. Every document in flight fails with
+# the pool, not only the one that killed it, so each gets another try on the new pool.
+POOL_ATTEMPTS = 2
+
+# Per-worker-process state, set up by _init_worker.
+_worker_options = None
+_worker_summarizer = None
+_worker_translator = None
+
+
+def find_pdfs(inputs: list) -> list:
+    """
+    Expands files, directories (searched recursively) and glob patterns into a sorted,
+    de-duplicated list of PDF paths.
+    """
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = glob.glob(os.path.join(entry, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(entry, recursive=True) or [entry]
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith('.pdf'):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def options_key(options: dict) -> str:
+    """
+    Returns a short hash of the SUMMARY_OPTIONS in options, recorded in the manifest next to
+    each document hash.
+    """
+    summary_options = {name: options.get(name) for name in SUMMARY_OPTIONS}
+    return hashlib.sha256(json.dumps(summary_options, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_manifest(manifest_path: str) -> set:
+    """
+    Returns the set of "<document hash> <options key>" entries completed by earlier runs.
+    """
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path, 'r', encoding='utf-8') as manifest:
+        return {line.strip() for line in manifest if line.strip()}
+
+
+def _init_worker(options: dict):
+    global _worker_options
+    _worker_options = options
+    if options.get('tesseract_cmd'):
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = options['tesseract_cmd']
+
+
+def _new_record(path: str, sha256: str) -> dict:
+    return {'path': path, 'sha256': sha256, 'pages': 0, 'characters': 0, 'language': None, 'summary': None,
+            'error': None, 'seconds': None, 'ocr_pages': 0, 'ocr_confidence': None}
+
+
+def _summarize_file(path: str, sha256: str) -> dict:
+    """
+    Summarizes one PDF inside a worker process. Models are loaded once per worker.
+    """
+    global _worker_summarizer, _worker_translator
+    from document_pipeline import run_pipeline
+    from summarizer import DocumentSummarizer
+    from translator import DocumentTranslator
+
+    options = _worker_options
+    if _worker_summarizer is None:
+        _worker_summarizer = DocumentSummarizer(quantize=options['quantize'])
+        _worker_translator = DocumentTranslator() if options['translate'] else None
+
+    record = _new_record(path, sha256)
+    started = time.perf_counter()
+    stats = {}
+    try:
+        result = run_pipeline(
+            path, _worker_summarizer, _worker_translator,
+            poppler_path=options['poppler_path'],
+            ocr_workers=options['ocr_workers'],
+            native_workers=options['native_workers'],
+            min_length=options['min_length'],
+            max_length=options['max_length'],
+            hierarchical=options['hierarchical'],
+            extractive_budget=options['extractive_budget'],
+            stats=stats
+        )
+        if result is None:
+            record['error'] = "Could not extract any meaningful text."
+        else:
+            extracted_text, record['language'], record['summary'] = result
+            record['characters'] = len(extracted_text)
+            if not record['summary']:
+                record['error'] = "Summary could not be generated." # Not added to the manifest, so retried
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['pages'] = stats.get('pages', 0)
+    ocr_confidence = stats.get('ocr_confidence') or {}
+    record['ocr_pages'] = len(ocr_confidence)
+    record['ocr_confidence'] = round(sum(ocr_confidence.values()) / len(ocr_confidence), 1) if ocr_confidence else None
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes records to Parquet in row groups. Parquet files cannot be appended to, so a
+    resumed run writes a new numbered part file next to the original one.
+    """
+    ROW_GROUP_SIZE = 256
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        base, extension = os.path.splitext(path)
+        part = 1
+        while os.path.exists(path):
+            path = f"{base}.part{part}{extension}"
+            part += 1
+        self.path = path
+        self.rows = []
+        self.writer = None
+
+    def write(self, record: dict) -> None:
+        self.rows.append(record)
+        if len(self.rows) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self._schema())
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def _schema(self):
+        pa = self.pa
+        return pa.schema([
+            ('path', pa.string()), ('sha256', pa.string()), ('pages', pa.int64()),
+            ('characters', pa.int64()), ('language', pa.string()), ('summary', pa.string()),
+            ('error', pa.string()), ('seconds', pa.float64()), ('ocr_pages', pa.int64()),
+            ('ocr_confidence', pa.float64()),
+        ])
+
+    def close(self) -> None:
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def run_batch(paths: list, output_path: str, manifest_path: str, workers: int, options: dict) -> None:
+    """
+    Summarizes paths across a process pool, writing one record per document to output_path
+    and the hash of every successful document to manifest_path. Documents are hashed as they
+    are submitted, while the workers summarize the ones before them; a file that cannot be
+    read gets an error record. If a worker process dies, the pool is replaced and the
+    documents it was running are retried (see POOL_ATTEMPTS).
+    """
+    completed = load_manifest(manifest_path)
+    key = options_key(options)
+    print(f"{len(paths)} PDFs found.")
+
+    seen = set()
+    retries = [] # (path, sha256, attempt) of documents lost with a broken pool
+    pending = {} # future -> (executor, path, sha256, attempt)
+    queued = iter(paths)
+    writer = None
+    started = time.perf_counter()
+    done_docs = failed_docs = done_pages = skipped = 0
+
+    def new_executor():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,))
+
+    def finish(record):
+        nonlocal writer, done_docs, failed_docs, done_pages
+        if writer is None: # Created on the first record, so a run with nothing to do writes nothing
+            parquet = output_path.lower().endswith('.parquet')
+            writer = ParquetWriter(output_path) if parquet else JsonlWriter(output_path)
+        writer.write(record)
+        if record['error']:
+            failed_docs += 1
+            print(f"Failed: {record['path']}: {record['error']}")
+        else:
+            # Only successful documents are recorded, so failures are retried on the next run.
+            manifest.write(f"{record['sha256']} {key}\n")
+            manifest.flush()
+        done_docs += 1
+        done_pages += record['pages']
+
+        minutes = (time.perf_counter() - started) / 60
+        print(f"[{done_docs + skipped}/{len(paths)}] {done_docs / minutes:.1f} docs/min, "
+              f"{done_pages / minutes:.1f} pages/min, {failed_docs} failed")
+
+    def submit_next():
+        nonlocal skipped
+        if retries:
+            path, sha256, attempt = retries.pop()
+            pending[executor.submit(_summarize_file, path, sha256)] = (executor, path, sha256, attempt)
+            return
+        for path in queued:
+            try:
+                sha256 = file_sha256(path)
+            except OSError as e: # Unreadable, or gone since it was found
+                record = _new_record(path, None)
+                record['error'] = f"{type(e).__name__}: {e}"
+                finish(record)
+                continue
+            if f"{sha256} {key}" in completed or sha256 in seen: # Finished documents and duplicate files
+                skipped += 1
+                continue
+            seen.add(sha256)
+            pending[executor.submit(_summarize_file, path, sha256)] = (executor, path, sha256, 1)
+            return
+
+    executor = new_executor()
+    try:
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            # Keep a couple of documents queued per worker rather than submitting the whole list up front.
+            for _ in range(workers * 2):
+                submit_next()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future_executor, path, sha256, attempt = pending.pop(future)
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool as e:
+                        if future_executor is executor:
+                            print("A worker process died; starting a new pool.")
+                            executor.shutdown(wait=False)
+                            executor = new_executor()
+                        if attempt < POOL_ATTEMPTS:
+                            retries.append((path, sha256, attempt + 1))
+                            submit_next()
+                            continue
+                        record = _new_record(path, sha256)
+                        record['error'] = f"{type(e).__name__}: {e}"
+                    except Exception as e:
+                        record = _new_record(path, sha256)
+                        record['error'] = f"{type(e).__name__}: {e}"
+                    submit_next()
+                    finish(record)
+    finally:
+        executor.shutdown()
+        if writer is not None:
+            writer.close()
+
+    print(f"Finished {done_docs} documents ({done_pages} pages, {failed_docs} failed, {skipped} already done or duplicates) "
+          f"in {time.perf_counter() - started:.1f}s.")
+    if writer is not None:
+        print(f"Results: {getattr(writer, 'path', output_path)}")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize directories of PDFs without interaction.")
+    parser.add_argument('inputs', nargs='+', help="PDF files, directories (searched recursively) or glob patterns.")
+    parser.add_argument('--output', '-o', required=True, help="Output file: .jsonl or .parquet.")
+    parser.add_argument('--manifest', help="Manifest of completed documents (hash and options). Defaults to <output>.manifest.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+    parser.add_argument('--ocr-workers', type=int, default=1,
+                        help="OCR processes per worker. Keep at 1 unless workers are fewer than cores.")
+    parser.add_argument('--native-workers', type=int, default=1,
+                        help="Processes per worker extracting the text layer of large PDFs in page ranges.")
+    parser.add_argument('--poppler-path', help="Poppler 'bin' directory, if not on PATH.")
+    parser.add_argument('--tesseract-cmd', help="Tesseract executable, if not on PATH.")
+    parser.add_argument('--min-length', type=int, default=50)
+    parser.add_argument('--max-length', type=int, default=200)
+    parser.add_argument('--hierarchical', action='store_true', help="Reduce long summaries to about max-length tokens.")
+    parser.add_argument('--extractive-budget', type=int,
+                        help="Keep only the most central sentences, up to this many tokens, before summarizing.")
+    parser.add_argument('--no-translate', action='store_true', help="Summarize non-English documents untranslated.")
+    parser.add_argument('--quantize', action='store_true', help="Use the int8-quantized summarization model.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    paths = find_pdfs(args.inputs)
+    if not paths:
+        print("No PDF files found.")
+        return 1
+
+    options = {
+        'poppler_path': args.poppler_path,
+        'tesseract_cmd': args.tesseract_cmd,
+        'ocr_workers': args.ocr_workers,
+        'native_workers': args.native_workers,
+        'min_length': args.min_length,
+        'max_length': args.max_length,
+        'hierarchical': args.hierarchical,
+        'extractive_budget': args.extractive_budget,
+        'translate': not args.no_translate,
+        'quantize': args.quantize,
+    }
+    run_batch(paths, args.output, args.manifest or args.output + ".manifest", max(1, args.workers), options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Compares the native text extraction backends in text_extractor on speed and fidelity.
+
+Usage:
+    python benchmarks/native_backends.py [PDF or directory ...] [--repeat 3] [--reference pypdf2]
+
+Defaults to the files in sample_documents/. For every installed backend and every PDF it
+reports pages/sec and a fidelity score: the word-level F1 overlap between the backend's text
+and the reference backend's text (1.00 = the same words, ignoring order and whitespace).
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import text_extractor # noqa: E402
+
+
+def word_f1(text: str, reference: str) -> float:
+    words, reference_words = Counter(text.split()), Counter(reference.split())
+    if not words and not reference_words:
+        return 1.0
+    overlap = sum((words & reference_words).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(words.values())
+    recall = overlap / sum(reference_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def time_backend(backend: str, pdf_path: str, repeat: int):
+    """
+    Returns (pages, best seconds of `repeat` runs, extracted text), or None if the backend
+    could not read the file.
+    """
+    extract = text_extractor._NATIVE_BACKENDS[backend]
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            pages_text = extract(pdf_path)
+        except Exception as e:
+            print(f"  {backend}: failed on {os.path.basename(pdf_path)}: {e}")
+            return None
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    if isinstance(pages_text, str): # PyPDF2 sentinel
+        return None
+    return len(pages_text), best, "\n".join(pages_text)
+
+
+def main(argv: list = None) -> int:
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sample_documents')
+    parser = argparse.ArgumentParser(description="Benchmark native PDF text extraction backends.")
+    parser.add_argument('inputs', nargs='*', default=[default_dir], help="PDF files or directories.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per file and backend; the fastest is reported.")
+    parser.add_argument('--reference', default='pypdf2', help="Backend whose text the others are compared against.")
+    args = parser.parse_args(argv)
+
+    pdf_paths = []
+    for entry in args.inputs:
+        pattern = os.path.join(entry, '*.pdf') if os.path.isdir(entry) else entry
+        pdf_paths.extend(sorted(glob.glob(pattern)))
+    if not pdf_paths:
+        print("No PDF files found.")
+        return 1
+
+    backends = [name for name in text_extractor.NATIVE_BACKEND_ORDER if text_extractor._backend_available(name)]
+    if args.reference not in backends:
+        print(f"Reference backend '{args.reference}' is not installed.")
+        return 1
+    print(f"Backends: {', '.join(backends)} (reference: {args.reference})\n")
+
+    totals = {backend: [0, 0.0, []] for backend in backends} # pages, seconds, fidelity scores
+    for pdf_path in pdf_paths:
+        print(os.path.basename(pdf_path))
+        results = {backend: time_backend(backend, pdf_path, args.repeat) for backend in backends}
+        reference = results[args.reference]
+        for backend, result in results.items():
+            if result is None:
+                continue
+            pages, seconds, text = result
+            fidelity = word_f1(text, reference[2]) if reference else float('nan')
+            totals[backend][0] += pages
+            totals[backend][1] += seconds
+            totals[backend][2].append(fidelity)
+            print(f"  {backend:<10} {pages:>5} pages {seconds * 1000:>9.1f} ms "
+                  f"{pages / seconds if seconds else float('inf'):>9.1f} pages/s  "
+                  f"{len(text):>8} chars  fidelity {fidelity:.2f}")
+
+    print("\nOverall")
+    for backend, (pages, seconds, scores) in totals.items():
+        if not scores:
+            continue
+        print(f"  {backend:<10} {pages / seconds if seconds else float('inf'):>9.1f} pages/s  "
+              f"mean fidelity {sum(scores) / len(scores):.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
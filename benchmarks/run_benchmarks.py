@@ -0,0 +1,293 @@
+"""
+End-to-end benchmark suite: times each stage of the summarization pipeline, and the full
+streaming pipeline, on the sample documents and on synthetic N-page PDFs.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--pages 10,100] [--repeat 5] [--output results.json]
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json [--tolerance 0.15]
+
+Stages:
+    native     text layer extraction (extract_native_pages)
+    extract    hybrid extraction, native text plus OCR of text-poor pages (iter_pdf_pages)
+    detect     language detection on the extracted text
+    chunk      sentence splitting and token-based chunking
+    summarize  DocumentSummarizer.generate_summary
+    pipeline   run_pipeline: all of the above, overlapped
+
+The summarizer runs a tiny stand-in model (benchmarks/stand_in_model.py) instead of
+distilbart, so the suite runs offline and measures the code around the model; translation
+is not benchmarked for the same reason. OCR needs Tesseract and Poppler: without them the
+OCR'd pages come back empty and the environment is recorded as ocr_available: false.
+
+Every (document, stage) case runs in a fresh process, so peak RSS is that of the case alone.
+For each case the report gives latency percentiles over the timed runs, pages/sec and
+tokens/sec (at the median latency) and peak RSS. With --baseline, median latencies and peak
+RSS are compared with a stored run and the exit status is 1 if any case got slower or larger
+than the tolerance allows. Baselines are machine-specific: record one on the machine that
+will run the comparison.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.join(BENCHMARK_DIR, '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+STAGES = ('native', 'extract', 'detect', 'chunk', 'summarize', 'pipeline')
+SAMPLE_DOCUMENTS = ('sample_native.pdf', 'ocr_screenshot.pdf', 'Resume 3 .pdf')
+DEFAULT_SYNTHETIC_PAGES = (10, 100)
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """
+    Returns the q-th percentile of sorted_values, interpolating linearly between ranks.
+    """
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def peak_rss_mb():
+    """
+    Returns this process's peak resident set size in MB, or None where it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def ocr_available() -> bool:
+    return bool(shutil.which('tesseract') and shutil.which('pdftoppm'))
+
+
+def _stage_runner(stage: str, pdf_path: str, summarizer, text: str):
+    """
+    Returns a zero-argument function running one iteration of stage.
+    """
+    from nltk.tokenize import sent_tokenize
+    from document_pipeline import run_pipeline
+    from language_detector import detect_language
+    from stand_in_model import StandInTokenizer
+    from text_chunker import TokenChunker
+    from text_extractor import extract_native_pages, iter_pdf_pages
+
+    if stage == 'native':
+        return lambda: extract_native_pages(pdf_path)
+    if stage == 'extract':
+        return lambda: list(iter_pdf_pages(pdf_path))
+    if stage == 'detect':
+        return lambda: detect_language(text)
+    if stage == 'chunk':
+        # A fresh chunker per run, so its token count cache starts cold like it does for a new model.
+        return lambda: TokenChunker(StandInTokenizer()).chunk(sent_tokenize(text))
+    if stage == 'summarize':
+        return lambda: summarizer.generate_summary(text)
+    if stage == 'pipeline':
+        return lambda: run_pipeline(pdf_path, summarizer)
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def run_case(stage: str, pdf_path: str, repeat: int, warmup: int) -> dict:
+    """
+    Benchmarks one stage on one document. Runs in its own process (see run_suite).
+
+    Returns:
+        dict: 'pages', 'tokens', 'latencies' (seconds, one per timed run) and 'peak_rss_mb'.
+    """
+    from stand_in_model import StandInTokenizer, install_stand_in
+    from summarizer import DocumentSummarizer
+    from text_extractor import iter_pdf_pages
+
+    summarizer = DocumentSummarizer(model_name=install_stand_in())
+    # Untimed setup: the text the text-only stages work on, and the work done per run.
+    pages_text = [text for _, text in iter_pdf_pages(pdf_path)]
+    text = "\n".join(pages_text)
+    tokens = len(StandInTokenizer().encode(text, add_special_tokens=False))
+
+    run = _stage_runner(stage, pdf_path, summarizer, text)
+    for _ in range(warmup):
+        run()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started)
+    return {'pages': len(pages_text), 'tokens': tokens, 'latencies': latencies, 'peak_rss_mb': peak_rss_mb()}
+
+
+def summarize_case(raw: dict) -> dict:
+    latencies = sorted(raw['latencies'])
+    median = percentile(latencies, 50)
+    result = {'pages': raw['pages'], 'tokens': raw['tokens'], 'runs': len(latencies)}
+    for q in PERCENTILES:
+        result[f'p{q}_ms'] = round(percentile(latencies, q) * 1000, 3)
+    result['mean_ms'] = round(statistics.fmean(latencies) * 1000, 3)
+    result['pages_per_sec'] = round(raw['pages'] / median, 2) if median else None
+    result['tokens_per_sec'] = round(raw['tokens'] / median, 1) if median else None
+    result['peak_rss_mb'] = raw['peak_rss_mb']
+    return result
+
+
+def make_synthetic_documents(directory: str, page_counts: list) -> dict:
+    """
+    Writes a synthetic PDF per page count, built from the sentences of sample_native.pdf.
+
+    Returns:
+        dict: Maps document names ("synthetic-100p") to their paths.
+    """
+    from synthetic_pdf import write_synthetic_pdf
+    from text_extractor import extract_native_pages
+
+    source = extract_native_pages(os.path.join(REPO_DIR, 'sample_documents', 'sample_native.pdf'))
+    text = " ".join(source) if isinstance(source, list) else ""
+    sentences = [s for s in re.split(r'(?<=[.!?])\s+', " ".join(text.split())) if 40 <= len(s) <= 300]
+    if not sentences:
+        sentences = ["The quick brown fox jumps over the lazy dog while the benchmark measures throughput."]
+
+    documents = {}
+    for page_count in page_counts:
+        path = os.path.join(directory, f'synthetic-{page_count}p.pdf')
+        write_synthetic_pdf(path, page_count, sentences, seed=page_count)
+        documents[f'synthetic-{page_count}p'] = path
+    return documents
+
+
+def run_suite(documents: dict, stages: list, repeat: int, warmup: int) -> dict:
+    """
+    Runs every (document, stage) case, each in a freshly spawned process.
+
+    Returns:
+        dict: Maps "<document>::<stage>" to the case's summarized results.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name, path in documents.items():
+        for stage in stages:
+            key = f"{name}::{stage}"
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                try:
+                    raw = executor.submit(run_case, stage, path, repeat, warmup).result()
+                except Exception as e:
+                    print(f"{key:<40} failed: {type(e).__name__}: {e}")
+                    continue
+            results[key] = summarize_case(raw)
+            r = results[key]
+            print(f"{key:<40} p50 {r['p50_ms']:>10.1f} ms  p90 {r['p90_ms']:>10.1f} ms  "
+                  f"{r['pages_per_sec'] or 0:>9.1f} pages/s  {r['tokens_per_sec'] or 0:>11.1f} tokens/s  "
+                  f"peak {r['peak_rss_mb'] or 0:>7.1f} MB")
+    return results
+
+
+def environment() -> dict:
+    from text_extractor import resolve_native_backend
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'native_backend': resolve_native_backend(),
+        'ocr_available': ocr_available(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Prints how each case compares with the baseline and returns the regressions found.
+    """
+    regressions = []
+    base_results = baseline.get('results', {})
+    for key, current in results.items():
+        base = base_results.get(key)
+        if base is None:
+            print(f"{key:<40} new (not in baseline)")
+            continue
+        changes = []
+        for metric in ('p50_ms', 'peak_rss_mb'):
+            if not base.get(metric) or current.get(metric) is None:
+                continue
+            ratio = current[metric] / base[metric]
+            changes.append(f"{metric} {base[metric]:.1f} -> {current[metric]:.1f} ({(ratio - 1) * 100:+.1f}%)")
+            if ratio > 1 + tolerance:
+                regressions.append(f"{key} {metric}")
+        print(f"{key:<40} {'  '.join(changes)}")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PDF summarization pipeline.")
+    parser.add_argument('--documents', nargs='*',
+                        default=[os.path.join(REPO_DIR, 'sample_documents', name) for name in SAMPLE_DOCUMENTS],
+                        help="PDFs to benchmark. Defaults to the sample documents.")
+    parser.add_argument('--pages', default=",".join(map(str, DEFAULT_SYNTHETIC_PAGES)),
+                        help="Comma-separated page counts of synthetic documents to add ('' for none).")
+    parser.add_argument('--stages', default=",".join(STAGES), help="Comma-separated stages to run.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case.")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs per case before timing.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', help="Compare against this baseline JSON file.")
+    parser.add_argument('--save-baseline', help="Write the results as a baseline JSON file.")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed slowdown / RSS growth relative to the baseline (0.15 = 15%%).")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    page_counts = [int(count) for count in args.pages.split(',') if count.strip()]
+
+    documents = {os.path.basename(path): path for path in args.documents if os.path.isfile(path)}
+    env = environment()
+    print(f"Environment: {json.dumps(env)}")
+    if not env['ocr_available']:
+        print("Tesseract/Poppler not found: OCR'd pages will be empty.")
+
+    with tempfile.TemporaryDirectory(prefix='pdf-benchmark-') as directory:
+        documents.update(make_synthetic_documents(directory, page_counts))
+        if not documents:
+            print("No documents to benchmark.")
+            return 1
+        results = run_suite(documents, stages, max(1, args.repeat), max(0, args.warmup))
+
+    report = {'environment': env, 'repeat': args.repeat, 'results': results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        print(f"\nCompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        if baseline.get('environment') != env:
+            print(f"Warning: the baseline was recorded in a different environment: {baseline.get('environment')}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+A tiny, dependency-free stand-in for the transformers summarization pipeline, so the
+benchmarks run offline and measure everything around the model (extraction, detection,
+chunking, batching, queueing) without downloading or running distilbart.
+
+The stand-in is "lead-N": it returns the leading words of each input, up to max_length
+tokens. Its tokenizer splits on words and punctuation, which is close enough to a real
+subword tokenizer for chunk sizes and tokens/sec to be meaningful.
+"""
+import re
+import zlib
+
+STAND_IN_MODEL = "benchmark/stand-in-lead"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class StandInTokenizer:
+    model_max_length = 1024
+
+    def encode(self, text: str, add_special_tokens: bool = True) -> list:
+        ids = [zlib.crc32(token.encode('utf-8')) % 50000 for token in _TOKEN_PATTERN.findall(text)]
+        if add_special_tokens:
+            ids = [0] + ids + [2]
+        return ids
+
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:
+        return 2
+
+
+class StandInSummarizationPipeline:
+    """
+    Callable like pipeline("summarization"): takes a string or a list of strings and returns
+    [{'summary_text': ...}] per input.
+    """
+
+    def __init__(self):
+        self.tokenizer = StandInTokenizer()
+
+    def __call__(self, inputs, min_length: int = 0, max_length: int = 200, truncation: bool = True, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        results = []
+        for text in texts:
+            tokens = _TOKEN_PATTERN.findall(text)
+            if truncation:
+                tokens = tokens[:self.tokenizer.model_max_length]
+            results.append({'summary_text': " ".join(tokens[:max_length])})
+        return results
+
+
+def install_stand_in() -> str:
+    """
+    Registers the stand-in with the model registry and returns its model name, to be passed
+    to DocumentSummarizer(model_name=...).
+    """
+    from model_registry import register_pipeline
+    register_pipeline("summarization", STAND_IN_MODEL, StandInSummarizationPipeline())
+    return STAND_IN_MODEL
@@ -0,0 +1,71 @@
+"""
+Writes synthetic N-page text PDFs for the benchmarks, with no dependencies beyond the
+standard library. Pages are filled with sentences drawn (with a fixed seed) from a source
+text, so every run of a benchmark sees the same documents.
+"""
+import random
+import textwrap
+
+LINES_PER_PAGE = 48
+CHARS_PER_LINE = 95
+
+
+def _escape(line: str) -> bytes:
+    line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return line.encode('latin-1', errors='replace')
+
+
+def _page_stream(lines: list) -> bytes:
+    parts = [b"BT /F1 10 Tf 12 TL 50 770 Td"]
+    for line in lines:
+        parts.append(b"(" + _escape(line) + b") '")
+    parts.append(b"ET")
+    return b"\n".join(parts)
+
+
+def write_text_pdf(path: str, pages: list) -> None:
+    """
+    Writes a PDF with one page per entry of pages, each a list of text lines.
+    """
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page.
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for index, lines in enumerate(pages):
+        page_number, content_number = 4 + 2 * index, 5 + 2 * index
+        stream = _page_stream(lines)
+        objects[page_number] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number)
+        objects[content_number] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        kids.append(b"%d 0 R" % page_number)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    with open(path, 'wb') as pdf:
+        pdf.write(b"%PDF-1.4\n")
+        offsets = {}
+        for number in sorted(objects):
+            offsets[number] = pdf.tell()
+            pdf.write(b"%d 0 obj\n%s\nendobj\n" % (number, objects[number]))
+        xref_offset = pdf.tell()
+        pdf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for number in sorted(objects):
+            pdf.write(b"%010d 00000 n \n" % offsets[number])
+        pdf.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                  % (len(objects) + 1, xref_offset))
+
+
+def write_synthetic_pdf(path: str, num_pages: int, sentences: list, seed: int = 0) -> None:
+    """
+    Writes a num_pages page PDF of full pages of text made from sentences, sampled with seed.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(num_pages):
+        lines = []
+        while len(lines) < LINES_PER_PAGE:
+            paragraph = " ".join(rng.choice(sentences) for _ in range(rng.randint(3, 8)))
+            lines.extend(textwrap.wrap(paragraph, CHARS_PER_LINE) + [""])
+        pages.append(lines[:LINES_PER_PAGE])
+    write_text_pdf(path, pages)
@@ -0,0 +1,290 @@
+import contextvars
+import queue
+import threading
+from collections import Counter
+
+from nltk.tokenize import sent_tokenize
+
+from extractive_filter import select_top_sentences
+from text_extractor import iter_pdf_pages
+from language_detector import detect_language_sections
+import metrics
+
+# --- Streaming document pipeline ---
+# extraction -> language detection / translation -> chunking -> summarization
+#
+# Each stage runs in its own thread and hands its output to the next stage through a
+# bounded queue, so summarization of the first chunks starts while later pages are still
+# being OCR'd. OCR itself runs in the extractor's process pool and the models release the
+# GIL during inference, so the stages overlap and end-to-end latency approaches that of
+# the slowest stage instead of the sum of all of them.
+
+# Queue sizes bound how far a fast stage may run ahead of a slow one (and so memory use).
+PAGE_QUEUE_SIZE = 16
+TEXT_QUEUE_SIZE = 16
+CHUNK_QUEUE_SIZE = 8
+
+# Pages are collected into blocks of at least this much text (or the rest of the document),
+# and the language of each block is detected section by section, about DETECTION_SECTION_CHARS
+# characters at a time, so each part of a mixed-language document is translated from its own language.
+DETECTION_MIN_CHARS = 4000
+DETECTION_SECTION_CHARS = 2000
+
+# How often (in seconds) a stage blocked on a queue checks whether the pipeline was stopped.
+QUEUE_POLL_SECONDS = 0.1
+
+_DONE = object() # End-of-stream marker passed down the queues
+
+
+class _Stopped(Exception):
+    """Raised in a stage waiting on a queue once another stage (or the caller) has failed."""
+
+
+def _put(output_queue: queue.Queue, item, stop: threading.Event) -> None:
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            output_queue.put(item, timeout=QUEUE_POLL_SECONDS)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(input_queue: queue.Queue, stop: threading.Event):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            return input_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            pass
+
+
+def _drain(pending_queue: queue.Queue) -> None:
+    """Discards everything in a queue, unblocking a stage waiting to put into it."""
+    try:
+        while True:
+            pending_queue.get_nowait()
+    except queue.Empty:
+        pass
+
+
+def _run_stage(target, output_queue: queue.Queue, errors: list, stop: threading.Event, *args):
+    """
+    Runs a stage function and closes its output queue when it is done. If the stage fails,
+    its exception is recorded and every other stage is told to stop, so none of them waits
+    forever on a queue the failed stage will never read from or write to again.
+    """
+    try:
+        target(output_queue, stop, *args)
+    except _Stopped:
+        return
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+        return
+    try:
+        _put(output_queue, _DONE, stop)
+    except _Stopped:
+        pass
+
+
+def _iter_queue(input_queue: queue.Queue, stop: threading.Event):
+    while True:
+        item = _get(input_queue, stop)
+        if item is _DONE:
+            return
+        yield item
+
+
+def _extract_stage(page_queue, stop, pdf_path, poppler_path, ocr_workers, native_workers, stats):
+    pages = iter_pdf_pages(pdf_path, poppler_path=poppler_path, ocr_workers=ocr_workers,
+                           native_workers=native_workers, ocr_confidence=stats['ocr_confidence'])
+    try:
+        for _, text in pages:
+            stats['pages'] += 1
+            if text.strip():
+                _put(page_queue, text, stop)
+    finally:
+        pages.close() # Waits for (and frees) any OCR pages still in flight when the pipeline stops early
+
+
+def _language_stage(text_queue, stop, page_queue, translator, result):
+    """
+    Detects the language of each section of the document and passes the text on, with
+    non-English sections translated to English if possible. The original and the passed-on
+    text, and the language covering most of the document, are recorded in result.
+    """
+    pages = []
+    forwarded = []
+    block = []
+    language_chars = Counter()
+
+    def forward_block():
+        block_text = "\n".join(block)
+        num_sections = max(1, len(block_text) // DETECTION_SECTION_CHARS)
+        sections = detect_language_sections(block_text, num_spans=num_sections)
+        for index, section in enumerate(sections):
+            # Sections are cut where the language changes; move each cut to the next word break.
+            start = _word_break(block_text, section['start']) if index else 0
+            end = _word_break(block_text, section['end']) if index < len(sections) - 1 else len(block_text)
+            section_text = block_text[start:end]
+            language = section['language']
+            language_chars[language] += len(section_text)
+            if language not in ('en', 'unknown') and translator is not None and translator.can_translate(language):
+                section_text = translator.translate_to_english(section_text, language) or section_text
+            if section_text.strip():
+                forwarded.append(section_text)
+                _put(text_queue, section_text, stop)
+        block.clear()
+
+    for page_text in _iter_queue(page_queue, stop):
+        pages.append(page_text)
+        block.append(page_text)
+        if sum(len(text) for text in block) >= DETECTION_MIN_CHARS:
+            forward_block()
+    if block:
+        forward_block()
+
+    known = {language: chars for language, chars in language_chars.items() if language != 'unknown'}
+    result['language'] = max(known, key=known.get) if known else 'unknown'
+    result['extracted_text'] = "\n".join(pages)
+    result['text'] = "\n".join(forwarded)
+
+
+def _word_break(text: str, position: int) -> int:
+    while position < len(text) and not text[position].isspace():
+        position += 1
+    return position
+
+
+def _iter_sentences(text_queue, stop):
+    """
+    Yields sentences from the stream of page texts. The last sentence of each page is held
+    back until the next page arrives, since it may continue there.
+    """
+    carry = ""
+    for text in _iter_queue(text_queue, stop):
+        sentences = sent_tokenize(f"{carry} {text}" if carry else text)
+        if not sentences:
+            continue
+        yield from sentences[:-1]
+        carry = sentences[-1]
+    if carry:
+        yield carry
+
+
+def _chunk_stage(chunk_queue, stop, text_queue, chunker, extractive_budget):
+    sentences = _iter_sentences(text_queue, stop)
+    if extractive_budget:
+        # Sentences are scored against the whole document, so with the filter on, chunks are
+        # only produced (and summarized) once every page has been extracted.
+        sentences = select_top_sentences(list(sentences), extractive_budget, length_fn=chunker.count_tokens)
+    for chunk_text in chunker.iter_chunks(sentences):
+        _put(chunk_queue, chunk_text, stop)
+
+
+def run_pipeline(pdf_path: str, summarizer, translator=None, poppler_path: str = None,
+                 ocr_workers: int = None, min_length: int = 50, max_length: int = 200,
+                 batch_size: int = 8, hierarchical: bool = False, stats: dict = None,
+                 native_workers: int = None, on_summary=None, extractive_budget: int = None):
+    """
+    Extracts, detects, translates (if needed) and summarizes a PDF as a streaming pipeline.
+
+    Args:
+        pdf_path (str | bytes | file-like): The path to the PDF file, or its contents.
+        summarizer (DocumentSummarizer): The summarizer to use.
+        translator (DocumentTranslator, optional): Used for non-English documents. None disables translation.
+        poppler_path (str, optional): Path to Poppler's 'bin' directory if not in system PATH.
+        ocr_workers (int, optional): Number of OCR worker processes used for text-poor pages.
+        min_length (int): The minimum length of each chunk summary (in tokens).
+        max_length (int): The maximum length of each chunk summary (in tokens).
+        batch_size (int): Maximum number of ready chunks summarized per forward pass.
+        hierarchical (bool): Summarize the chunk summaries again until they fit max_length.
+        stats (dict, optional): Filled with run statistics: 'pages' (number of pages extracted) and
+                                'ocr_confidence' ({page_index: mean OCR word confidence} for OCR'd pages).
+        native_workers (int, optional): Number of processes extracting the text layer of large PDFs.
+        on_summary (callable, optional): Called with each batch of new chunk summaries (a list of str,
+                                         in document order) as soon as it is produced, e.g. to stream them.
+        extractive_budget (int, optional): Token budget for the extractive pre-filter (see
+                                           DocumentSummarizer.generate_summary). None sends every sentence to the model.
+
+    Returns:
+        tuple | None: (extracted_text, detected_lang, summary), or None if no text could be extracted.
+                      detected_lang is the language of most of the document.
+    """
+    with metrics.timer('document_seconds'):
+        if not summarizer.summarizer:
+            return None
+
+        page_queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+        text_queue = queue.Queue(maxsize=TEXT_QUEUE_SIZE)
+        chunk_queue = queue.Queue(maxsize=CHUNK_QUEUE_SIZE)
+        errors = []
+        stop = threading.Event()
+        result = {'extracted_text': "", 'text': "", 'language': "unknown"}
+        if stats is None:
+            stats = {}
+        stats['pages'] = 0
+        stats['ocr_confidence'] = {}
+
+        # Each stage runs in a copy of this context, so an active metrics trace sees its timers.
+        stages = [
+            threading.Thread(target=contextvars.copy_context().run, daemon=True, name='pipeline-extract',
+                             args=(_run_stage, _extract_stage, page_queue, errors, stop, pdf_path, poppler_path,
+                                   ocr_workers, native_workers, stats)),
+            threading.Thread(target=contextvars.copy_context().run, daemon=True, name='pipeline-language',
+                             args=(_run_stage, _language_stage, text_queue, errors, stop, page_queue, translator,
+                                   result)),
+            threading.Thread(target=contextvars.copy_context().run, daemon=True, name='pipeline-chunk',
+                             args=(_run_stage, _chunk_stage, chunk_queue, errors, stop, text_queue,
+                                   summarizer.chunker, extractive_budget)),
+        ]
+        for stage in stages:
+            stage.start()
+
+        # Summarization runs in this thread, batching whatever chunks are ready.
+        summary_parts = []
+        finished = False
+        try:
+            while not finished:
+                batch = [_get(chunk_queue, stop)]
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(chunk_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _DONE in batch:
+                    batch.remove(_DONE)
+                    finished = True
+                if batch:
+                    new_parts = summarizer.summarize_chunks(batch, min_length, max_length, batch_size)
+                    summary_parts.extend(new_parts)
+                    if on_summary is not None and new_parts:
+                        on_summary(new_parts)
+        except _Stopped:
+            pass # A stage failed; its error is raised below
+        finally:
+            # Whether the document is done, a stage failed or this thread raised, stop every
+            # stage and unblock any stage waiting to hand on its output, then wait for them.
+            stop.set()
+            for stage_queue in (page_queue, text_queue, chunk_queue):
+                _drain(stage_queue)
+            for stage in stages:
+                stage.join()
+        if errors:
+            raise errors[0]
+
+        extracted_text = result['extracted_text']
+        if not extracted_text.strip():
+            return None
+
+        if hierarchical:
+            summary_parts = summarizer.reduce_summaries(summary_parts, min_length, max_length, batch_size, max_length)
+        summary = " ".join(summary_parts).strip()
+        if not summary:
+            # Let generate_summary handle (and report) short or unsummarizable text, in English.
+            summary = summarizer.generate_summary(result['text'], min_length=min_length, max_length=max_length,
+                                                  extractive_budget=extractive_budget)
+        return extracted_text, result['language'], summary
@@ -0,0 +1,98 @@
+import re
+
+import numpy as np
+
+# Words are runs of two or more letters; numbers and punctuation carry little topical signal.
+_WORD_RE = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+
+# Sentences with fewer words than this (page numbers, "Confidential", headings) are scored down proportionally.
+MIN_SENTENCE_WORDS = 6
+
+
+def score_sentences(sentences: list) -> np.ndarray:
+    """
+    Scores sentences by TF-IDF cosine similarity to the document centroid, so sentences
+    about the document's main topics score high while boilerplate, headers and reference
+    entries score low. Very short sentences are scored down, and exact repeats of an
+    earlier sentence (running headers and footers) score -inf.
+
+    The TF-IDF matrix is kept as (row, column, value) triplets and reduced with NumPy
+    bincounts, so the cost is linear in the number of words and no dense
+    sentence-by-vocabulary matrix is ever built.
+
+    Args:
+        sentences (list): The sentences of the document, in order.
+
+    Returns:
+        np.ndarray: One score per sentence.
+    """
+    n = len(sentences)
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    scores = np.zeros(n)
+    if not vocabulary:
+        return scores
+
+    rows = np.asarray(rows)
+    cols = np.asarray(cols)
+    # Collapse repeated words within a sentence into (sentence, word) term counts.
+    pairs, term_counts = np.unique(rows * len(vocabulary) + cols, return_counts=True)
+    rows, cols = np.divmod(pairs, len(vocabulary))
+
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1
+    weights = term_counts * idf[cols]
+
+    # L2-normalize every sentence vector.
+    norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=n))
+    weights = weights / norms[rows]
+
+    centroid = np.bincount(cols, weights, minlength=len(vocabulary)) / n
+    centroid_norm = np.linalg.norm(centroid)
+    if centroid_norm > 0:
+        centroid /= centroid_norm
+    scores = np.bincount(rows, weights * centroid[cols], minlength=n)
+    words_per_sentence = np.bincount(rows, term_counts, minlength=n)
+    scores *= np.minimum(1.0, words_per_sentence / MIN_SENTENCE_WORDS)
+
+    seen = set()
+    for i, sentence in enumerate(sentences):
+        key = " ".join(sentence.split()).lower()
+        if key in seen:
+            scores[i] = -np.inf
+        seen.add(key)
+    return scores
+
+
+def select_top_sentences(sentences: list, budget: int, length_fn=len) -> list:
+    """
+    Keeps the highest-scoring sentences whose combined length fits the budget, in their
+    original document order.
+
+    Args:
+        sentences (list): The sentences of the document, in order.
+        budget (int): Maximum combined length of the kept sentences, measured with length_fn.
+        length_fn (callable): Measures a sentence, e.g. len (characters) or a token counter.
+
+    Returns:
+        list: The kept sentences, in document order.
+    """
+    lengths = [length_fn(sentence) for sentence in sentences]
+    if sum(lengths) <= budget:
+        return list(sentences)
+
+    scores = score_sentences(sentences)
+    kept = []
+    used = 0
+    for i in np.argsort(-scores, kind='stable'):
+        if scores[i] == -np.inf:
+            break
+        if used + lengths[i] <= budget:
+            kept.append(i)
+            used += lengths[i]
+    return [sentences[i] for i in sorted(kept)]
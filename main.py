@@ -1,7 +1,6 @@
+import logging
 import os
 import sys
-import nltk
-from nltk.tokenize import sent_tokenize # Make sure sent_tokenize is imported if used in DocumentTranslator
 
 import pytesseract
 from pdf2image import convert_from_path # This is needed for the extract_text_from_pdf module to use
@@ -19,77 +18,49 @@ GLOBAL_POPPLER_PATH = r"C:\Users\shaha\Downloads\Release-24.08.0-0\poppler-24.08
 # Example: r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 GLOBAL_TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe" # <--- IMPORTANT: VERIFY THIS IS YOUR ACTUAL TESSERACT.EXE PATH!
 
+# Keep only the most central sentences, up to this many tokens, before summarizing (e.g. 8000).
+# None sends every sentence to the model.
+GLOBAL_EXTRACTIVE_BUDGET = None
+
 # Set pytesseract to use the specified Tesseract executable
 pytesseract.pytesseract.tesseract_cmd = GLOBAL_TESSERACT_CMD
 # --- End Configuration ---
 
 
 # Import your custom modules
-from text_extractor import extract_text_from_pdf
-from language_detector import detect_language
+from text_extractor import EXTRACTOR_VERSION, resolve_native_backend
+from document_pipeline import run_pipeline
 from summarizer import DocumentSummarizer
+from translator import DocumentTranslator
+from result_cache import ResultCache, compute_cache_key
 
-from transformers import pipeline # Import pipeline for the translator
-
-# Make sure nltk punkt is downloaded for sent_tokenize
-try:
-    nltk.data.find('tokenizers/punkt')
-except nltk.downloader.DownloadError:
-    nltk.download('punkt')
-
-class DocumentTranslator:
-    def __init__(self, model_name: str = "Helsinki-NLP/opus-mt-mul-en"):
-        """
-        Initializes the translation pipeline for translating multiple languages to English.
-        """
-        try:
-            print(f"Loading translation model: {model_name}...")
-            self.translator = pipeline("translation", model=model_name)
-            print("Translation Model loaded successfully.")
-        except Exception as e:
-            print(f"Error loading translation model {model_name}: {e}")
-            self.translator = None
-
-    def translate_to_english(self, text: str, source_lang: str) -> str:
-        """
-        Translates text from a source language to English.
-        """
-        if not self.translator:
-            return text # Return original text if translator failed to load
-
-        # Chunking for translation if text is very long (models have input limits)
-        MAX_TRANSLATION_CHUNK_CHARS = 1000 # Typical for translation models
-        
-        translated_parts = []
-        sentences = sent_tokenize(text)
-        
-        current_chunk = []
-        current_chunk_char_count = 0
+def process_pdf(pdf_path: str, summarizer: DocumentSummarizer, translator: DocumentTranslator,
+                poppler_path: str = None, extractive_budget: int = None):
+    """
+    Runs extraction, language detection, translation (if needed) and summarization on one PDF.
 
-        for sentence in sentences:
-            if current_chunk_char_count + len(sentence) + 1 > MAX_TRANSLATION_CHUNK_CHARS and current_chunk:
-                chunk_text = " ".join(current_chunk)
-                try:
-                    translated = self.translator(chunk_text, max_length=MAX_TRANSLATION_CHUNK_CHARS*2)
-                    translated_parts.append(translated[0]['translation_text'])
-                except Exception as e:
-                    print(f"Warning: Failed to translate a chunk. Error: {e}")
-                
-                current_chunk = [sentence]
-                current_chunk_char_count = len(sentence) + 1
-            else:
-                current_chunk.append(sentence)
-                current_chunk_char_count += len(sentence) + 1
-
-        if current_chunk:
-            chunk_text = " ".join(current_chunk)
-            try:
-                translated = self.translator(chunk_text, max_length=MAX_TRANSLATION_CHUNK_CHARS*2)
-                translated_parts.append(translated[0]['translation_text'])
-            except Exception as e:
-                print(f"Warning: Failed to translate final chunk. Error: {e}")
-        
-        return " ".join(translated_parts).strip()
+    Returns:
+        tuple | None: (extracted_text, detected_lang, summary), or None if no text could be extracted.
+    """
+    # Extraction, language detection, translation and summarization run as overlapping
+    # stages: early chunks are summarized while later pages are still being OCR'd.
+    try:
+        # Large native PDFs have their text layer extracted across all cores.
+        result = run_pipeline(pdf_path, summarizer, translator, poppler_path=poppler_path,
+                              min_length=50, max_length=200, native_workers=os.cpu_count(),
+                              extractive_budget=extractive_budget)
+    except Exception as e:
+        print(f"An error occurred while processing '{os.path.basename(pdf_path)}': {e}")
+        return None
+
+    if result is None:
+        print(f"Could not extract any meaningful text from '{os.path.basename(pdf_path)}'. Cannot summarize.")
+        return None
+
+    extracted_text, detected_lang, summary = result
+    print(f"Text extraction complete. Total characters: {len(extracted_text)}")
+    print(f"Detected Language: {detected_lang}")
+    return result
 
 
 def main():
@@ -101,23 +72,24 @@ def main():
     # No longer set to None, so it correctly passes the path to extract_text_from_pdf
     local_poppler_path_for_main = GLOBAL_POPPLER_PATH
 
+    # Progress messages from the extractor, summarizer and translator are logged; show them plainly.
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     # Initialize the English summarizer
     print("Initializing document summarizer (English)...")
     summarizer = DocumentSummarizer()
 
-    # Initialize the multilingual translator
-    print("Initializing document translator (Multilingual to English)...")
+    # Initialize the multilingual translator.
+    # Its model is only loaded once a non-English document actually needs translating.
     translator = DocumentTranslator()
 
-    # Check if models loaded successfully
+    # Check if the summarization model loaded successfully
     if not summarizer.summarizer:
         print("Failed to initialize summarization model. Exiting.")
         sys.exit(1)
-    if not translator.translator:
-        print("Failed to initialize translation model. Non-English summarization may not work. Continuing with English only.")
-        # We can decide to exit or continue with limited functionality if translator fails
-        # For now, let's allow it to continue but warn.
+
+    # Results are cached by file content, so re-submitting a document skips all processing.
+    result_cache = ResultCache()
 
     print("\n--- PDF Document Summarizer ---")
     print("Enter the path to the PDF file you want to summarize, or type 'exit' to quit.")
@@ -139,43 +111,32 @@ def main():
 
         print(f"Processing '{os.path.basename(pdf_path)}'...")
 
-        # 1. Text Extraction
-        # Pass the global Poppler path here
-        extracted_text = extract_text_from_pdf(pdf_path, poppler_path=local_poppler_path_for_main)
-
-        if extracted_text in ["ENCRYPTED_PDF", "CORRUPTED_PDF"]:
-            print(f"Processing stopped for '{os.path.basename(pdf_path)}' due to PDF issue.")
-            continue
-        
-        if not extracted_text:
-            print(f"Could not extract any meaningful text from '{os.path.basename(pdf_path)}'. Cannot summarize.")
-            continue
-        
-        print(f"Text extraction complete. Total characters: {len(extracted_text)}")
-
-        # 2. Language Detection
-        detected_lang = detect_language(extracted_text)
-        print(f"Detected Language: {detected_lang}")
-
-        text_to_summarize = extracted_text
-        if detected_lang != 'en' and translator.translator:
-            print(f"Detected non-English language '{detected_lang}'. Translating to English for summarization...")
-            translated_text = translator.translate_to_english(extracted_text, detected_lang)
-            if translated_text:
-                text_to_summarize = translated_text
-                print(f"Translation complete. Translated characters: {len(translated_text)}")
-            else:
-                print("Translation failed or produced empty text. Attempting summarization of original text.")
-                # Fallback: try summarizing original if translation fails
-        elif detected_lang != 'en' and not translator.translator:
-            print(f"Detected non-English language '{detected_lang}', but translator is not available. Summarizing original text (may not be optimal).")
-
-        # 3. Summarization (always in English now)
-        summary = summarizer.generate_summary(
-            text_to_summarize,
+        cache_key = compute_cache_key(
+            pdf_path,
+            extractor=EXTRACTOR_VERSION,
+            native_backend=resolve_native_backend(),
+            summarizer_model=summarizer.model_name,
+            summarizer_quantized=summarizer.quantize,
+            translator_model=translator.model_name,
+            translator_pair_models=translator.use_pair_models,
             min_length=50,
-            max_length=200
+            max_length=200,
+            extractive_budget=GLOBAL_EXTRACTIVE_BUDGET
         )
+        cached = result_cache.get(cache_key)
+        if cached:
+            print(f"Found cached result for '{os.path.basename(pdf_path)}' (language: {cached['language']}).")
+            summary = cached['summary']
+        else:
+            # Pass the global Poppler path here
+            result = process_pdf(pdf_path, summarizer, translator, poppler_path=local_poppler_path_for_main,
+                                 extractive_budget=GLOBAL_EXTRACTIVE_BUDGET)
+            if result is None:
+                continue
+            extracted_text, detected_lang, summary = result
+            if summary:
+                # Only successful results are cached, so a failure is retried next time.
+                result_cache.put(cache_key, extracted_text, detected_lang, summary)
 
         print("\n--- Generated Summary ---")
         if summary:
@@ -0,0 +1,227 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Stage metrics and traces ---
+# Counters and latency histograms for each pipeline stage, kept in process memory and
+# rendered in the Prometheus text format (see summarizer_app's /metrics view). Recording a
+# sample is a dictionary update under a lock, cheap enough for per-page and per-chunk use.
+#
+# A trace is opt-in and per request: inside `with trace() as spans:`, every timer() also
+# records a span (stage, labels, start and duration), including timers in the pipeline's
+# stage threads, which run in a copy of the caller's context.
+#
+# Worker processes keep their own registry; drain() and merge() move their samples into the
+# process that serves /metrics.
+
+METRIC_PREFIX = "pdf_summarizer_"
+
+# Histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# A trace keeps at most this many spans (OCR of a long scan records one per page).
+MAX_TRACE_SPANS = 5000
+
+# Help text for every metric, shown in the /metrics output.
+METRIC_HELP = {
+    'document_seconds': "Time to extract and summarize one document.",
+    'native_extraction_seconds': "Time to extract the native text layer of one document.",
+    'page_seconds': "Extraction time per page, by method (native: amortized over the document; ocr: per page).",
+    'pages_total': "Pages extracted, by method.",
+    'rasterize_seconds': "Time to rasterize one window of pages for OCR.",
+    'detection_seconds': "Time to detect the language of a document, or of the sections of a block of it.",
+    'translation_seconds': "Time to translate one block of text to English.",
+    'translated_sentences_total': "Sentences sent to a translation model (cache misses).",
+    'summarizer_batch_seconds': "Time to summarize one batch of chunks.",
+    'summarizer_chunks_total': "Chunks summarized.",
+    'summarizer_chunk_failures_total': "Chunks that could not be summarized.",
+    'cache_requests_total': "Summary cache lookups, by result (hit or miss).",
+    'jobs_total': "Finished summary jobs, by status.",
+}
+
+_lock = threading.Lock()
+_counters = {} # (name, labels) -> value
+_histograms = {} # (name, labels) -> [bucket counts..., sum, count]
+
+_current_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """
+    Adds amount to a counter.
+    """
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """
+    Records one latency sample in a histogram.
+    """
+    key = (name, _label_key(labels))
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+        histogram[bucket] += 1 # The last bucket counts samples above every bound (+Inf)
+        histogram[-2] += seconds
+        histogram[-1] += 1
+
+
+class Trace:
+    """
+    The spans recorded during one traced request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, started: float, seconds: float, labels: dict) -> None:
+        with self._lock:
+            if len(self.spans) >= MAX_TRACE_SPANS:
+                self.dropped += 1
+                return
+            self.spans.append({
+                'stage': stage,
+                'start_ms': round((started - self.started) * 1000, 3),
+                'duration_ms': round(seconds * 1000, 3),
+                'thread': threading.current_thread().name,
+                **labels,
+            })
+
+    def to_dict(self) -> dict:
+        """
+        Returns the spans in start order, with the total traced time, as JSON-ready data.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start_ms'])
+            return {
+                'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+                'spans': spans,
+                'dropped_spans': self.dropped,
+            }
+
+
+@contextmanager
+def trace():
+    """
+    Records a span for every timer() run inside the block (and in stage threads started
+    from it). Yields the Trace.
+    """
+    active = Trace()
+    token = _current_trace.set(active)
+    try:
+        yield active
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """
+    Times the block into the histogram `name` and, if a trace is active, records a span.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, started, time.perf_counter() - started, **labels)
+
+
+def record(name: str, started: float, seconds: float, **labels) -> None:
+    """
+    Like timer(), for work timed by the caller: started is its time.perf_counter() start.
+    """
+    observe(name, seconds, **labels)
+    active = _current_trace.get()
+    if active is not None:
+        active.add(name, started, seconds, labels)
+
+
+def drain() -> dict:
+    """
+    Returns everything recorded in this process since the last drain() and resets the
+    registry, e.g. to hand a worker's samples to the parent process with merge().
+    """
+    global _counters, _histograms
+    with _lock:
+        snapshot = {'counters': list(_counters.items()), 'histograms': list(_histograms.items())}
+        _counters, _histograms = {}, {}
+    return snapshot
+
+
+def merge(snapshot: dict) -> None:
+    """
+    Adds the samples of a drain() snapshot (from another process) to this process's registry.
+    """
+    with _lock:
+        for key, value in snapshot['counters']:
+            key = (key[0], tuple(map(tuple, key[1])))
+            _counters[key] = _counters.get(key, 0) + value
+        for key, values in snapshot['histograms']:
+            key = (key[0], tuple(map(tuple, key[1])))
+            histogram = _histograms.setdefault(key, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0])
+            for i, value in enumerate(values):
+                histogram[i] += value
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{_escape(str(value))}"' for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """
+    Returns every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(values)) for key, values in _histograms.items())
+
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+
+    for (name, labels), value in counters:
+        describe(name, 'counter')
+        lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), values in histograms:
+        describe(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), values):
+            cumulative += count
+            lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {values[-2]}")
+        lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {values[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """
+    Clears every metric in this process.
+    """
+    drain()
@@ -0,0 +1,109 @@
+import gc
+import logging
+import threading
+
+# --- Process-wide model registry ---
+# Every DocumentSummarizer / DocumentTranslator asks the registry for its pipeline, so each
+# model is loaded once per process, on first use, and shared by all instances.
+# Calling preload_models() before a server forks its workers lets the workers share the
+# weights copy-on-write instead of each holding its own copy.
+
+logger = logging.getLogger(__name__)
+
+_pipelines = {}
+_lock = threading.Lock()
+
+
+def _optimize_pipeline(nlp_pipeline, quantize: bool = False, compile_model: bool = False):
+    """
+    Optionally applies dynamic int8 quantization and/or torch.compile to a pipeline's model.
+    """
+    import torch
+
+    if quantize:
+        # Dynamic quantization of the Linear layers: smaller weights and faster CPU inference.
+        nlp_pipeline.model = torch.quantization.quantize_dynamic(
+            nlp_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    if compile_model:
+        # Compile forward() only, so generate() keeps working and uses the compiled forward pass.
+        nlp_pipeline.model.forward = torch.compile(nlp_pipeline.model.forward)
+    return nlp_pipeline
+
+
+def get_pipeline(task: str, model_name: str, quantize: bool = False, compile_model: bool = False):
+    """
+    Returns the shared pipeline for (task, model_name), loading it on first use.
+
+    Args:
+        task (str): The transformers pipeline task, e.g. "summarization" or "translation".
+        model_name (str): The HuggingFace model name.
+        quantize (bool): Load a dynamically int8-quantized variant (CPU only).
+        compile_model (bool): Wrap the model's forward pass with torch.compile.
+
+    Returns:
+        The transformers pipeline. Raises if the model cannot be loaded.
+    """
+    key = (task, model_name, quantize, compile_model)
+    nlp_pipeline = _pipelines.get(key)
+    if nlp_pipeline is not None:
+        return nlp_pipeline
+
+    with _lock:
+        # Another thread may have loaded it while we waited for the lock.
+        if key not in _pipelines:
+            from transformers import pipeline
+
+            nlp_pipeline = pipeline(task, model=model_name)
+            if quantize or compile_model:
+                nlp_pipeline = _optimize_pipeline(nlp_pipeline, quantize=quantize, compile_model=compile_model)
+            _pipelines[key] = nlp_pipeline
+        return _pipelines[key]
+
+
+def register_pipeline(task: str, model_name: str, nlp_pipeline, quantize: bool = False,
+                      compile_model: bool = False) -> None:
+    """
+    Installs an already built pipeline (or any object with the same call signature and a
+    tokenizer attribute) under (task, model_name), e.g. a small stand-in model for offline
+    benchmarks. Later get_pipeline() calls for that key return it instead of loading a model.
+    """
+    with _lock:
+        _pipelines[(task, model_name, quantize, compile_model)] = nlp_pipeline
+
+
+def preload_models(models: list) -> None:
+    """
+    Loads the given models up front, typically in a server's parent process before it forks.
+
+    Args:
+        models (list): (task, model_name) pairs, or (task, model_name, options) triples where
+                       options is a dict of get_pipeline keyword arguments.
+    """
+    for entry in models:
+        task, model_name = entry[0], entry[1]
+        options = entry[2] if len(entry) > 2 else {}
+        try:
+            logger.info(f"Preloading {task} model: {model_name}...")
+            get_pipeline(task, model_name, **options)
+        except Exception as e:
+            logger.exception(f"Error preloading {task} model {model_name}: {e}")
+
+    # Move everything allocated so far out of the garbage collector's reach, so collections in
+    # forked workers do not touch (and so copy) the pages holding the shared model objects.
+    gc.freeze()
+
+
+def loaded_models() -> list:
+    """
+    Returns the (task, model_name, quantize, compile_model) keys of the pipelines loaded so far.
+    """
+    return list(_pipelines)
+
+
+def clear_models() -> None:
+    """
+    Drops every loaded pipeline, e.g. to free memory or to swap models in benchmarks.
+    """
+    with _lock:
+        _pipelines.clear()
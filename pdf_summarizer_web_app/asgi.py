@@ -13,4 +13,29 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pdf_summarizer_web_app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """
+    The Django application, plus the ASGI lifespan protocol: the shared Gemini client opened on
+    the server's event loop is closed when the server shuts down.
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            from summarizer_app import llm_client
+            await llm_client.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+# Load the summarization model once, before the server forks its workers, so they share it.
+from django.conf import settings
+
+if getattr(settings, 'SUMMARIZER_PRELOAD_MODELS', False):
+    from summarizer_app.jobs import preload_components
+    preload_components()
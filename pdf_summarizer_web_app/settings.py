@@ -162,4 +162,67 @@ os.environ['TESSDATA_PREFIX'] = TESSDATA_PREFIX
 SUMMARIZER_CORE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'pdf_summarizer_project'))
 # Add this path to Python's system path so Django can import your modules
 import sys
-sys.path.insert(0, SUMMARIZER_CORE_PATH)
\ No newline at end of file
+sys.path.insert(0, SUMMARIZER_CORE_PATH)
+
+# Content-addressed cache of extraction/summarization results (see result_cache.py)
+SUMMARY_CACHE_PATH = os.path.join(BASE_DIR, 'summary_cache.sqlite3')
+SUMMARY_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Least-recently-used entries are evicted beyond this size
+
+# Background summarization jobs (see summarizer_app/jobs.py)
+SUMMARIZER_JOB_WORKERS = 2 # Number of worker processes; sets how many PDFs are summarized at once
+SUMMARIZER_JOB_DIR = os.path.join(BASE_DIR, 'job_uploads') # Uploads are spooled here until processed
+SUMMARIZER_JOB_HEARTBEAT_SECONDS = 30 # How often a running job records that its worker is still alive
+SUMMARIZER_STALE_JOB_SECONDS = 5 * 60 # A running job with no heartbeat for this long is assumed lost and rerun
+
+# Uploads up to FILE_UPLOAD_MAX_MEMORY_SIZE stay in memory and are handed to the worker as bytes.
+# Larger ones are streamed by Django to a unique file in SUMMARIZER_JOB_DIR, which the job then
+# takes over as is (a rename). The directory is created when the app starts (apps.py).
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+FILE_UPLOAD_TEMP_DIR = SUMMARIZER_JOB_DIR
+
+# Model loading (see model_registry.py)
+SUMMARIZER_QUANTIZE = False # Use a dynamically int8-quantized summarization model (CPU only)
+SUMMARIZER_PRELOAD_MODELS = False # Load models in wsgi/asgi before workers fork, so they share the weights
+SUMMARIZER_TRANSLATE = True # Translate non-English documents to English before summarizing
+SUMMARIZER_NATIVE_WORKERS = 1 # Processes per job extracting the text layer of large (64+ page) PDFs in page ranges
+SUMMARIZER_MIN_LENGTH = 50 # Minimum tokens of each chunk summary
+SUMMARIZER_MAX_LENGTH = 200 # Maximum tokens of each chunk summary
+SUMMARIZER_EXTRACTIVE_BUDGET = None # Tokens of the most central sentences sent to the model (e.g. 8000); None sends all
+SUMMARIZER_STREAM_POLL_INTERVAL = 0.5 # Seconds between checks for new chunk summaries in a job stream
+SUMMARIZER_STREAM_TIMEOUT = 30 * 60 # A job stream is closed after this many seconds; the client reconnects
+SUMMARIZER_VIEW_THREADS = 8 # Threads for the blocking parts (upload parsing, database writes) of the async views
+SUMMARIZER_HISTORY_PAGE_SIZE = 20 # Summaries per page of the result history
+SUMMARIZER_HISTORY_PREVIEW_CHARS = 200 # Characters of each summary shown in the history list
+SUMMARIZER_DOWNLOAD_CHUNK_CHARS = 64 * 1024 # Characters read from the database per chunk of a streamed download
+
+# Gemini API used by the expand/keywords features (see summarizer_app/llm_client.py).
+# Set GEMINI_API_BASE_URL to a local stub server for testing.
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', "") # Required by those features; never commit a key here
+GEMINI_API_BASE_URL = os.environ.get('GEMINI_API_BASE_URL', "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', "gemini-2.0-flash")
+GEMINI_TIMEOUT = (5, 60) # Connect and read timeouts, in seconds
+GEMINI_MAX_RETRIES = 3 # Retries (with exponential backoff) on connection errors, 429 and 5xx
+LLM_CACHE_TIMEOUT = 24 * 60 * 60 # Seconds a generated expansion/keyword list is reused (Django cache)
+
+# Instrumentation (see metrics.py)
+SUMMARIZER_METRICS_ENABLED = False # Serve stage counters and latency histograms at /metrics (Prometheus format)
+SUMMARIZER_METRICS_ALLOWED_IPS = ('127.0.0.1', '::1') # Addresses that may scrape /metrics (staff users always may)
+SUMMARIZER_TRACE_ENABLED = True # Let uploads ask for a per-stage trace (trace=1), returned with the job result
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        # Django's own messages go to the same handler, once.
+        'django': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        # Raise to DEBUG to follow individual requests.
+        'summarizer_app': {'level': 'INFO'},
+    },
+}
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pdf_summarizer_web_app.settings')
 
 application = get_wsgi_application()
+
+# Load the summarization model once, before the server forks its workers, so they share it.
+from django.conf import settings
+
+if getattr(settings, 'SUMMARIZER_PRELOAD_MODELS', False):
+    from summarizer_app.jobs import preload_components
+    preload_components()
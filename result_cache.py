@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Default location and size budget for the on-disk result cache.
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pdf_summarizer", "results.sqlite3")
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024 # 256 MB
+DEFAULT_TRANSLATION_CACHE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "translations.sqlite3")
+DEFAULT_TRANSLATION_CACHE_MAX_ENTRIES = 1_000_000
+
+
+def compute_cache_key(pdf_path, **params) -> str:
+    """
+    Computes a content-addressed cache key for a PDF.
+
+    The key is the SHA-256 of the file's bytes combined with every parameter that
+    influences the result (extractor version, model names, summary lengths, ...),
+    so changing any of them naturally invalidates old entries.
+
+    Args:
+        pdf_path (str | bytes | file-like): The path to the PDF file, or its contents
+                                            (bytes, memoryview, mmap or a binary file object).
+        **params: Versions and settings the cached result depends on.
+
+    Returns:
+        str: A hex digest identifying this (document, configuration) pair.
+    """
+    digest = hashlib.sha256()
+    if isinstance(pdf_path, (str, os.PathLike)):
+        with open(pdf_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+    elif hasattr(pdf_path, 'read') and not isinstance(pdf_path, mmap.mmap):
+        pdf_path.seek(0)
+        for block in iter(lambda: pdf_path.read(1024 * 1024), b''):
+            digest.update(block)
+    else:
+        digest.update(pdf_path) # bytes-like and mmap objects are hashed in place
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    A SQLite-backed cache of extraction and summarization results, keyed by compute_cache_key.
+    Entries are evicted least-recently-used first once the stored text exceeds max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """
+        Args:
+            path (str): Path of the SQLite database file. Created if it does not exist.
+            max_bytes (int): Size budget for the cached text, in bytes.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " extracted_text TEXT NOT NULL,"
+                " language TEXT NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str):
+        """
+        Looks up a cached result and marks it as recently used.
+
+        Returns:
+            dict | None: {'extracted_text', 'language', 'summary'} or None on a cache miss.
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT extracted_text, language, summary FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+        return {'extracted_text': row[0], 'language': row[1], 'summary': row[2]}
+
+    def put(self, key: str, extracted_text: str, language: str, summary: str) -> None:
+        """
+        Stores a result, then evicts least-recently-used entries until the cache fits max_bytes.
+        """
+        size = sum(len(value.encode('utf-8')) for value in (extracted_text, language, summary))
+        if size > self.max_bytes:
+            return # Never cache a single result larger than the whole budget.
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, extracted_text, language, summary, size, last_access)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, extracted_text, language, summary, size, time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store result in cache: {e}")
+
+    def _evict(self, conn) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class TranslationCache:
+    """
+    A persistent sentence-level translation cache, keyed by (model, source language, sentence).
+    Repeated sentences (headers, legal boilerplate) are translated once, across documents.
+    Entries are evicted least-recently-used first beyond max_entries.
+    """
+
+    def __init__(self, path: str = DEFAULT_TRANSLATION_CACHE_PATH,
+                 max_entries: int = DEFAULT_TRANSLATION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " translation TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_last_access ON translations (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(model_name: str, source_lang: str, sentence: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{source_lang}\0{sentence}".encode('utf-8')).hexdigest()
+
+    def get_many(self, model_name: str, source_lang: str, sentences: list) -> dict:
+        """
+        Looks up cached translations.
+
+        Returns:
+            dict: Maps each sentence found in the cache to its translation.
+        """
+        keys = {self._key(model_name, source_lang, sentence): sentence for sentence in sentences}
+        found = {}
+        try:
+            with self._lock, self._connect() as conn:
+                key_list = list(keys)
+                # Stay well below SQLite's limit on the number of query parameters.
+                for start in range(0, len(key_list), 500):
+                    batch = key_list[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    for key, translation in conn.execute(
+                        f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", batch
+                    ):
+                        found[keys[key]] = translation
+                    conn.execute(
+                        f"UPDATE translations SET last_access = ? WHERE key IN ({placeholders})",
+                        [time.time()] + batch
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache lookup failed: {e}")
+        return found
+
+    def put_many(self, model_name: str, source_lang: str, translations: dict) -> None:
+        """
+        Stores sentence translations, given as a {sentence: translation} dict.
+        """
+        now = time.time()
+        rows = [(self._key(model_name, source_lang, sentence), translation, now)
+                for sentence, translation in translations.items()]
+        try:
+            with self._lock, self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translations (key, translation, last_access) VALUES (?, ?, ?)", rows
+                )
+                count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM translations WHERE key IN"
+                        " (SELECT key FROM translations ORDER BY last_access LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store translations in cache: {e}")
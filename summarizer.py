@@ -1,109 +1,263 @@
-from transformers import pipeline
-import nltk
+import logging
+
 from nltk.tokenize import sent_tokenize
 
+import metrics
+from extractive_filter import select_top_sentences
+from model_registry import get_pipeline
+from text_chunker import TokenChunker, ensure_punkt
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on reduce passes in hierarchical mode; each pass shrinks the text several-fold.
+MAX_REDUCE_LEVELS = 8
+
 # Ensure 'punkt' tokenizer data is downloaded for NLTK
-try:
-    nltk.data.find('tokenizers/punkt')
-except nltk.downloader.DownloadError:
-    nltk.download('punkt')
+ensure_punkt()
 
 
 class DocumentSummarizer:
-    def __init__(self, model_name: str = "sshleifer/distilbart-cnn-12-6"):
+    def __init__(self, model_name: str = "sshleifer/distilbart-cnn-12-6", quantize: bool = False,
+                 compile_model: bool = False):
         """
-        Initializes the summarization pipeline with a pre-trained English summarization model.
+        Sets up a summarizer for a pre-trained English summarization model. The model itself is
+        loaded lazily on first use, from the process-wide model registry, so every instance
+        using the same model shares a single copy of its weights.
 
         Args:
             model_name (str): The name of the HuggingFace pre-trained summarization model to use.
                               "sshleifer/distilbart-cnn-12-6" is a good English choice.
+            quantize (bool): Use a dynamically int8-quantized variant of the model (CPU only).
+            compile_model (bool): Run the model's forward pass through torch.compile.
+        """
+        self.model_name = model_name
+        self.quantize = quantize
+        self.compile_model = compile_model
+        self._summarizer = None
+        self._chunker = None
+        self._load_failed = False
+
+    @property
+    def summarizer(self):
+        """
+        The summarization pipeline, loaded on first access. None if the model failed to load.
         """
-        try:
-            print(f"Loading summarization model: {model_name}...")
-            self.summarizer = pipeline("summarization", model=model_name)
-            print("Summarization Model loaded successfully.")
-        except Exception as e:
-            print(f"Error loading summarization model {model_name}: {e}")
-            self.summarizer = None # Indicate that the model failed to load
+        if self._summarizer is None and not self._load_failed:
+            try:
+                logger.info(f"Loading summarization model: {self.model_name}...")
+                self._summarizer = get_pipeline(
+                    "summarization", self.model_name, quantize=self.quantize, compile_model=self.compile_model
+                )
+                # Chunks are sized with the model's own tokenizer (1024 tokens for distilbart-cnn-12-6).
+                self._chunker = TokenChunker(self._summarizer.tokenizer)
+                logger.info("Summarization Model loaded successfully.")
+            except Exception as e:
+                logger.error(f"Error loading summarization model {self.model_name}: {e}")
+                self._load_failed = True # Indicate that the model failed to load
+        return self._summarizer
 
-    def generate_summary(self, text: str, min_length: int = 50, max_length: int = 200) -> str:
+    @property
+    def chunker(self):
+        """
+        The TokenChunker matching the model's tokenizer. None if the model failed to load.
+        """
+        if self.summarizer is None:
+            return None
+        return self._chunker
+
+    def generate_summary(self, text: str, min_length: int = 50, max_length: int = 200,
+                         batch_size: int = 8, hierarchical: bool = False, target_length: int = None,
+                         extractive_budget: int = None, on_summary=None) -> str:
         """
         Generates a concise summary of the given text using the loaded NLP model.
-        Handles long texts by chunking them into smaller pieces and summarizing each chunk.
+        Handles long texts by chunking them into smaller pieces and summarizing the
+        chunks in batches (sorted by length across the whole document, see summarize_chunks()).
+
+        In hierarchical mode the chunk summaries are themselves packed into chunks and
+        summarized again, level by level, until the result fits target_length. This keeps
+        the output bounded for very long documents.
+
+        With extractive_budget set, a cheap TF-IDF pass first keeps only the most central
+        sentences (up to that many tokens), so boilerplate, headers and references never
+        reach the transformer.
 
         Args:
             text (str): The input text to be summarized.
             min_length (int): The minimum length of the generated summary (in tokens).
             max_length (int): The maximum length of the generated summary (in tokens).
+            batch_size (int): How many chunks are sent through the model per forward pass.
+                              Use 1 to summarize the chunks one at a time.
+            hierarchical (bool): Summarize the chunk summaries again until they fit target_length.
+            target_length (int, optional): Token budget for the hierarchical result.
+                                           Defaults to max_length.
+            extractive_budget (int, optional): Token budget for the extractive pre-filter.
+                                               None (the default) sends every sentence to the model.
+            on_summary (callable, optional): Called with each new chunk summary (as a one-item list)
+                                             as soon as it is produced. Chunks are then summarized
+                                             in document order (see iter_summary()) rather than
+                                             sorted by length.
 
         Returns:
-            str: The generated summary. Returns an empty string if summarization fails
-                 or the model was not loaded.
+            str: The generated summary. Returns an empty string if summarization fails, the text
+                 is too short or the model was not loaded (the reason is logged), so a failure is
+                 never mistaken for, or cached as, a summary.
         """
         if not self.summarizer:
-            return "Summarization model not loaded. Cannot generate summary."
+            logger.error("Summarization model not loaded. Cannot generate summary.")
+            return ""
         
         if not text or len(text.strip()) < min_length:
-            return "Input text is too short to summarize."
+            logger.warning("Input text is too short to summarize.")
+            return ""
 
-        # distilbart-cnn-12-6 has a max input length of 1024 tokens.
-        # We'll use a conservative estimate for characters.
-        MAX_CHUNK_CHARS = 3000 # Approx 1024 tokens * 3 chars/token
-        
-        full_summary_parts = []
-        sentences = sent_tokenize(text)
-        
-        current_chunk = []
-        current_chunk_char_count = 0
-
-        for sentence in sentences:
-            if current_chunk_char_count + len(sentence) + 1 > MAX_CHUNK_CHARS and current_chunk:
-                chunk_text = " ".join(current_chunk)
-                try:
-                    summary = self.summarizer(
-                        chunk_text,
-                        min_length=min_length,
-                        max_length=max_length,
-                        do_sample=False
-                    )
-                    full_summary_parts.append(summary[0]['summary_text'])
-                except Exception as e:
-                    print(f"Warning: Failed to summarize a chunk. Error: {e}")
-                
-                current_chunk = [sentence]
-                current_chunk_char_count = len(sentence) + 1
-            else:
-                current_chunk.append(sentence)
-                current_chunk_char_count += len(sentence) + 1
-
-        if current_chunk:
-            chunk_text = " ".join(current_chunk)
-            try:
-                summary = self.summarizer(
-                    chunk_text,
-                    min_length=min_length,
-                    max_length=max_length,
-                    do_sample=False
-                )
-                full_summary_parts.append(summary[0]['summary_text'])
-            except Exception as e:
-                print(f"Warning: Failed to summarize final chunk. Error: {e}")
+        if on_summary is not None:
+            full_summary_parts = []
+            for part in self.iter_summary(text, min_length=min_length, max_length=max_length,
+                                          batch_size=batch_size, extractive_budget=extractive_budget):
+                full_summary_parts.append(part)
+                on_summary([part])
+        else:
+            chunks = self.chunker.chunk(self._select_sentences(text, extractive_budget))
+            full_summary_parts = self.summarize_chunks(chunks, min_length, max_length, batch_size)
+        if hierarchical:
+            full_summary_parts = self.reduce_summaries(
+                full_summary_parts, min_length, max_length, batch_size, target_length or max_length
+            )
         
         final_summary = " ".join(full_summary_parts).strip()
 
         if not final_summary and text.strip():
-            if len(text.strip()) < MAX_CHUNK_CHARS and len(text.strip()) >= min_length:
+            if self.chunker.fits(text.strip()) and len(text.strip()) >= min_length:
                  try:
                     summary = self.summarizer(
                         text,
                         min_length=min_length,
                         max_length=max_length,
-                        do_sample=False
+                        do_sample=False,
+                        truncation=True
                     )
                     return summary[0]['summary_text']
                  except Exception as e:
-                    print(f"Failed to summarize as a single chunk either: {e}")
-                    return "Failed to generate summary."
-            return "Failed to generate summary due to chunking issues or insufficient content after processing."
+                    logger.error(f"Failed to summarize as a single chunk either: {e}")
+                    return ""
+            logger.warning("Failed to generate summary due to chunking issues or insufficient content after processing.")
+            return ""
+
+        return final_summary
+
+    def iter_summary(self, text: str, min_length: int = 50, max_length: int = 200, batch_size: int = 8,
+                     extractive_budget: int = None):
+        """
+        Generator form of generate_summary(): yields the summary of each chunk, in document
+        order, as soon as the batch holding it has been through the model. A caller can show
+        the start of a long document's summary after one forward pass instead of all of them.
+
+        Batches are runs of consecutive chunks, so early chunks are never held back behind
+        later ones (summarize_chunks() sorts a whole list by length instead). Hierarchical
+        reduction needs every chunk summary and so is left to generate_summary().
+
+        Args:
+            text (str): The input text to be summarized.
+            min_length (int): The minimum length of each chunk summary (in tokens).
+            max_length (int): The maximum length of each chunk summary (in tokens).
+            batch_size (int): How many chunks are sent through the model per forward pass.
+            extractive_budget (int, optional): Token budget for the extractive pre-filter.
+
+        Yields:
+            str: One summary per chunk. Nothing is yielded if the model is not loaded or the
+                 text is too short; generate_summary() reports those cases.
+        """
+        if not self.summarizer or not text or len(text.strip()) < min_length:
+            return
+
+        batch = []
+        for chunk in self.chunker.iter_chunks(self._select_sentences(text, extractive_budget)):
+            batch.append(chunk)
+            if len(batch) >= max(1, batch_size):
+                yield from self.summarize_chunks(batch, min_length, max_length, batch_size)
+                batch = []
+        if batch:
+            yield from self.summarize_chunks(batch, min_length, max_length, batch_size)
+
+    def _select_sentences(self, text: str, extractive_budget: int = None) -> list:
+        """
+        Splits text into sentences, keeping only the most central ones if extractive_budget is set.
+        """
+        sentences = sent_tokenize(text)
+        if extractive_budget:
+            sentences = select_top_sentences(sentences, extractive_budget, length_fn=self.chunker.count_tokens)
+        return sentences
+
+    def reduce_summaries(self, parts: list, min_length: int, max_length: int, batch_size: int,
+                         target_length: int) -> list:
+        """
+        Repeatedly packs summaries into model-sized chunks and summarizes them again (tree
+        fashion) until their combined length fits target_length tokens. Each level is
+        summarized in batches like the first pass.
+        """
+        for level in range(MAX_REDUCE_LEVELS):
+            total_tokens = sum(self.chunker.count_tokens(part) for part in parts)
+            if len(parts) <= 1 or total_tokens <= target_length:
+                break
+
+            chunks = self.chunker.chunk(parts)
+            if len(chunks) >= len(parts):
+                # Every summary already fills a whole chunk on its own; another pass would not shrink the text.
+                break
+
+            logger.info(f"Reducing {len(parts)} summaries ({total_tokens} tokens) into {len(chunks)} (level {level + 1})...")
+            reduced = self.summarize_chunks(chunks, min_length, max_length, batch_size)
+            if not reduced:
+                break
+            parts = reduced
+        return parts
+
+    def summarize_chunks(self, chunks: list, min_length: int, max_length: int,
+                         batch_size: int = 8) -> list:
+        """
+        Summarizes a list of chunks in batches and returns the summaries in document order.
+
+        Chunks are sorted by length before batching so that each batch holds inputs of
+        similar size and little compute is spent on padding. If a whole batch fails, its
+        chunks are retried one by one so a single bad chunk does not drop its neighbours.
+        Chunks that cannot be summarized at all are skipped.
+        """
+        batch_size = max(1, batch_size)
+        summaries = [None] * len(chunks)
+        order = sorted(range(len(chunks)), key=lambda i: len(chunks[i]))
+
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            batch = [chunks[i] for i in batch_indices]
+            try:
+                with metrics.timer('summarizer_batch_seconds'):
+                    results = self.summarizer(
+                        batch,
+                        min_length=min_length,
+                        max_length=max_length,
+                        do_sample=False,
+                        truncation=True,
+                        batch_size=len(batch)
+                    )
+                for i, result in zip(batch_indices, results):
+                    summaries[i] = result['summary_text']
+                metrics.inc('summarizer_chunks_total', len(batch))
+            except Exception as e:
+                logger.warning(f"Failed to summarize a batch of {len(batch)} chunks. Retrying one by one. Error: {e}")
+                for i in batch_indices:
+                    try:
+                        with metrics.timer('summarizer_batch_seconds'):
+                            result = self.summarizer(
+                                chunks[i],
+                                min_length=min_length,
+                                max_length=max_length,
+                                do_sample=False,
+                                truncation=True
+                            )
+                        summaries[i] = result[0]['summary_text']
+                        metrics.inc('summarizer_chunks_total')
+                    except Exception as chunk_error:
+                        metrics.inc('summarizer_chunk_failures_total')
+                        logger.warning(f"Failed to summarize chunk {i + 1}. Error: {chunk_error}")
 
-        return final_summary
\ No newline at end of file
+        return [summary for summary in summaries if summary is not None]
\ No newline at end of file
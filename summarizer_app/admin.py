@@ -1,3 +1,12 @@
 from django.contrib import admin
 
+from .models import SummaryJob
+
 # Register your models here.
+
+
+@admin.register(SummaryJob)
+class SummaryJobAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'status', 'detected_language', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('filename',)
@@ -1,6 +1,15 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SummarizerAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'summarizer_app'
+
+    def ready(self):
+        # Django spools large uploads here (FILE_UPLOAD_TEMP_DIR) and expects the directory to exist.
+        for directory in (getattr(settings, 'SUMMARIZER_JOB_DIR', None), getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)):
+            if directory:
+                os.makedirs(directory, exist_ok=True)
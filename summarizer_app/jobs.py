@@ -0,0 +1,442 @@
+import gc
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import connections, transaction
+from django.utils import timezone
+
+import metrics
+from .models import Document, Summary, SummaryJob, SummaryPart
+
+logger = logging.getLogger(__name__)
+
+# --- Background job queue ---
+# Uploads are recorded as SummaryJob rows; a pool of worker processes runs extraction,
+# language detection and summarization outside the HTTP request. Uploads Django kept in memory
+# (up to FILE_UPLOAD_MAX_MEMORY_SIZE) are handed to the worker as bytes; larger ones keep the
+# unique file Django spooled them to. Neither is stored in the database.
+# SUMMARIZER_JOB_WORKERS sets the number of worker processes (and so the throughput).
+
+_executor = None
+_executor_lock = threading.Lock()
+_broken_executors = set() # Pools whose breakage has been handled (see _on_job_finished)
+_pool_ids = {} # Pool -> the id it records on the jobs it claims (SummaryJob.worker)
+# Job id -> the bytes of an in-memory upload, kept by the server process until the job finishes
+# so a fresh pool can run it again. Their jobs have no pdf_path.
+_upload_buffers = {}
+_buffer_heartbeat = None
+
+# Per-worker-process components, loaded lazily by the first job a worker runs.
+_doc_summarizer = None
+_doc_translator = None
+_result_cache = None
+
+
+def _init_worker():
+    """
+    Prepares a freshly started worker process to use Django and the database.
+    """
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pdf_summarizer_web_app.settings')
+    django.setup()
+    # Database connections inherited from a forked parent must not be shared with it.
+    connections.close_all()
+    # Neither must the parent's metrics, or they would be merged back into it twice.
+    metrics.reset()
+
+
+def _get_components():
+    """
+    Loads the summarization model and result cache once per worker process.
+    """
+    global _doc_summarizer, _doc_translator, _result_cache
+    if _doc_summarizer is None:
+        import pytesseract
+        from summarizer import DocumentSummarizer
+        from translator import DocumentTranslator
+        from result_cache import ResultCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_MAX_BYTES
+
+        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+        _doc_summarizer = DocumentSummarizer(quantize=getattr(settings, 'SUMMARIZER_QUANTIZE', False))
+        _doc_summarizer.summarizer # Load the model now rather than halfway through the first job
+        if getattr(settings, 'SUMMARIZER_TRANSLATE', True):
+            # Translation models load lazily, on the first non-English document.
+            _doc_translator = DocumentTranslator()
+        _result_cache = ResultCache(
+            path=getattr(settings, 'SUMMARY_CACHE_PATH', DEFAULT_CACHE_PATH),
+            max_bytes=getattr(settings, 'SUMMARY_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES)
+        )
+    return _doc_summarizer, _doc_translator, _result_cache
+
+
+def preload_components() -> None:
+    """
+    Loads the summarization model in the server process before the job pool forks, so the
+    worker processes inherit it and share its weights copy-on-write instead of each loading
+    their own copy. Only effective where worker processes are forked (Linux/macOS with fork).
+    """
+    _get_components()
+    # Keep the garbage collector in forked workers from touching (and so copying) the model's pages.
+    gc.freeze()
+
+
+def _summarize_pdf(pdf_path, on_summary=None):
+    """
+    Runs the summarization pipeline on an uploaded PDF (a path or its bytes), using the
+    result cache when possible. on_summary is passed on to run_pipeline to receive chunk
+    summaries as they are produced.
+
+    Returns:
+        tuple: (summary, detected_language, error_message). error_message is None on success.
+    """
+    from text_extractor import EXTRACTOR_VERSION, resolve_native_backend
+    from document_pipeline import run_pipeline
+    from result_cache import compute_cache_key
+
+    doc_summarizer, doc_translator, result_cache = _get_components()
+    if not doc_summarizer.summarizer:
+        return "", "", "Summarizer core components failed to initialize. Check server logs."
+
+    min_length = getattr(settings, 'SUMMARIZER_MIN_LENGTH', 50)
+    max_length = getattr(settings, 'SUMMARIZER_MAX_LENGTH', 200)
+    extractive_budget = getattr(settings, 'SUMMARIZER_EXTRACTIVE_BUDGET', None)
+    # Everything that changes the summary is part of the key, so no configuration is served another's results.
+    cache_key = compute_cache_key(
+        pdf_path,
+        extractor=EXTRACTOR_VERSION,
+        native_backend=resolve_native_backend(),
+        summarizer_model=doc_summarizer.model_name,
+        summarizer_quantized=doc_summarizer.quantize,
+        translator_model=doc_translator.model_name if doc_translator else None,
+        translator_pair_models=doc_translator.use_pair_models if doc_translator else None,
+        min_length=min_length,
+        max_length=max_length,
+        extractive_budget=extractive_budget
+    )
+    cached = result_cache.get(cache_key)
+    metrics.inc('cache_requests_total', result='hit' if cached else 'miss')
+    if cached:
+        return cached['summary'], cached['language'], None
+
+    result = run_pipeline(pdf_path, doc_summarizer, doc_translator, poppler_path=settings.POPPLER_PATH,
+                          native_workers=getattr(settings, 'SUMMARIZER_NATIVE_WORKERS', 1), on_summary=on_summary,
+                          min_length=min_length, max_length=max_length, extractive_budget=extractive_budget)
+    if result is None:
+        return "", "", "Could not extract any meaningful text from the PDF. It might be empty or unreadable."
+
+    extracted_text, detected_lang, summary_text = result
+    if summary_text.strip():
+        # A failed summarization is not cached, so the next upload of the document tries again.
+        result_cache.put(cache_key, extracted_text, detected_lang, summary_text)
+    return summary_text, detected_lang, None
+
+
+@contextmanager
+def _heartbeat(job_id: int):
+    """
+    Touches a running job's updated_at every SUMMARIZER_JOB_HEARTBEAT_SECONDS while the
+    block runs, so _get_executor can tell a long job from one whose server process died.
+    """
+    interval = getattr(settings, 'SUMMARIZER_JOB_HEARTBEAT_SECONDS', 30)
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                SummaryJob.objects.filter(pk=job_id, status=SummaryJob.STATUS_RUNNING).update(
+                    updated_at=timezone.now()
+                )
+        finally:
+            connections.close_all() # This thread's connections only
+
+    thread = threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_summary_job(job_id: int, worker: str = "", pdf_data: bytes = None) -> str:
+    """
+    Processes one SummaryJob inside a worker process and records the outcome on the job.
+
+    Args:
+        job_id (int): The job to run.
+        worker (str): The id of the pool running it, recorded on the job.
+        pdf_data (bytes): The upload, for a job whose upload was kept in memory.
+
+    Returns:
+        str: The job's final status.
+    """
+    # Claim the job atomically so it is never processed twice, even if it was queued twice.
+    claimed = SummaryJob.objects.filter(pk=job_id, status=SummaryJob.STATUS_PENDING).update(
+        status=SummaryJob.STATUS_RUNNING, worker=worker, updated_at=timezone.now()
+    )
+    job = SummaryJob.objects.get(pk=job_id)
+    if not claimed:
+        return job.status
+    # Parts left by an earlier, interrupted run of the job are replaced.
+    SummaryPart.objects.filter(job_id=job_id).delete()
+
+    next_index = 0
+
+    def record_parts(texts):
+        # Chunk summaries are stored as they arrive, for job_stream to send on.
+        nonlocal next_index
+        SummaryPart.objects.bulk_create(
+            SummaryPart(job_id=job_id, index=next_index + offset, text=text) for offset, text in enumerate(texts)
+        )
+        next_index += len(texts)
+
+    pdf_source = pdf_data if pdf_data is not None else job.pdf_path
+    try:
+        if not pdf_source:
+            raise RuntimeError("the upload is no longer available; please upload the PDF again")
+        with _heartbeat(job_id):
+            if job.trace_requested:
+                with metrics.trace() as trace:
+                    summary_text, detected_lang, error_message = _summarize_pdf(pdf_source, on_summary=record_parts)
+                job.trace = trace.to_dict()
+            else:
+                summary_text, detected_lang, error_message = _summarize_pdf(pdf_source, on_summary=record_parts)
+        if not error_message and not summary_text.strip():
+            error_message = "Summary could not be generated. The document might be too short or contain no relevant information."
+        job.summary = summary_text
+        job.detected_language = detected_lang
+        job.error_message = error_message or ""
+        job.status = SummaryJob.STATUS_FAILED if error_message else SummaryJob.STATUS_DONE
+    except Exception as e:
+        job.error_message = f"An error occurred during summarization: {e}"
+        job.status = SummaryJob.STATUS_FAILED
+    finally:
+        if job.pdf_path and os.path.exists(job.pdf_path):
+            os.remove(job.pdf_path)
+
+    with transaction.atomic():
+        job.save()
+        if job.status == SummaryJob.STATUS_DONE and job.document_id:
+            Summary.objects.create(document_id=job.document_id, text=job.summary,
+                                   detected_language=job.detected_language)
+    # The full summary is on the job now; streams still open send it in their 'done' event.
+    SummaryPart.objects.filter(job_id=job_id).delete()
+    metrics.inc('jobs_total', status=job.status)
+    return job.status
+
+
+def _run_job(job_id: int, worker: str, pdf_data: bytes = None) -> dict:
+    """
+    Worker-process entry point: runs a job and returns the metrics the worker recorded
+    meanwhile, which the server process merges into its own (see _on_job_finished).
+    """
+    run_summary_job(job_id, worker, pdf_data)
+    return metrics.drain()
+
+
+def _fail_jobs(jobs, error) -> None:
+    """
+    Marks unfinished jobs as failed because their worker stopped, removing their uploads.
+    """
+    for job_id, pdf_path in jobs.exclude(status=SummaryJob.STATUS_DONE).values_list('id', 'pdf_path'):
+        _upload_buffers.pop(job_id, None)
+        metrics.inc('jobs_total', status='crashed')
+        logger.error(f"Summary job {job_id} crashed: {error}")
+        if pdf_path and os.path.exists(pdf_path):
+            os.remove(pdf_path)
+    jobs.exclude(status=SummaryJob.STATUS_DONE).update(
+        status=SummaryJob.STATUS_FAILED,
+        error_message=f"The summarization worker stopped unexpectedly: {error}"
+    )
+
+
+def _on_job_finished(job_id: int, executor: ProcessPoolExecutor, future) -> None:
+    """
+    Merges a finished job's metrics, or handles a job whose worker process died.
+
+    When a worker process dies (killed for running out of memory, for example), the whole
+    pool breaks and every job queued in it fails with BrokenProcessPool. Only the jobs that
+    were running are lost: they are marked as failed, and the ones that had not started yet
+    are queued again in a fresh pool. Jobs other pools (in other server processes) are
+    running are left alone.
+    """
+    global _executor
+    error = future.exception()
+    if error is None:
+        _upload_buffers.pop(job_id, None)
+        metrics.merge(future.result())
+        return
+    if not isinstance(error, BrokenProcessPool):
+        _fail_jobs(SummaryJob.objects.filter(pk=job_id), error)
+        return
+
+    with _executor_lock:
+        if executor in _broken_executors:
+            return # Handled when the first of its jobs reported the breakage
+        _broken_executors.add(executor)
+        if _executor is executor:
+            _executor = None
+        pool_id = _pool_ids.pop(executor, None)
+    if pool_id:
+        _fail_jobs(SummaryJob.objects.filter(status=SummaryJob.STATUS_RUNNING, worker=pool_id), error)
+    _get_executor() # Starts a fresh pool, which picks up the pending jobs
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'SUMMARIZER_JOB_WORKERS', 2),
+            initializer=_init_worker
+        )
+        executor = _executor
+        _pool_ids[executor] = _new_pool_id()
+
+    # Jobs whose heartbeat stopped (their server process stopped or was killed) are run again,
+    # and jobs queued by a previous server process that never started are picked up again.
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'SUMMARIZER_STALE_JOB_SECONDS', 60 * 60))
+    SummaryJob.objects.filter(status=SummaryJob.STATUS_RUNNING, updated_at__lt=stale_before).update(
+        status=SummaryJob.STATUS_PENDING, worker="", updated_at=timezone.now()
+    )
+    pending = SummaryJob.objects.filter(status=SummaryJob.STATUS_PENDING)
+    # An in-memory upload can only be run by the server process holding it. One whose job has
+    # had no heartbeat for a while was lost with the process that held it.
+    _fail_jobs(pending.filter(pdf_path="", updated_at__lt=stale_before).exclude(pk__in=list(_upload_buffers)),
+               "the server process holding the upload stopped")
+    for job_id, pdf_path in pending.values_list('id', 'pdf_path'):
+        if pdf_path or job_id in _upload_buffers:
+            _submit(executor, job_id)
+    return executor
+
+
+def _new_pool_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[-64:]
+
+
+def _submit(executor: ProcessPoolExecutor, job_id: int) -> None:
+    future = executor.submit(_run_job, job_id, _pool_ids.get(executor, ""), _upload_buffers.get(job_id))
+    future.add_done_callback(lambda f: _on_job_finished(job_id, executor, f))
+
+
+def _start_buffer_heartbeat() -> None:
+    """
+    Starts (once) a thread touching the updated_at of jobs waiting in _upload_buffers, so other
+    server processes can tell them from jobs whose process stopped (see _get_executor).
+    """
+    global _buffer_heartbeat
+    with _executor_lock:
+        if _buffer_heartbeat is not None:
+            return
+        interval = getattr(settings, 'SUMMARIZER_JOB_HEARTBEAT_SECONDS', 30)
+
+        def beat():
+            while True:
+                time.sleep(interval)
+                job_ids = list(_upload_buffers)
+                if not job_ids:
+                    continue
+                try:
+                    SummaryJob.objects.filter(pk__in=job_ids, status=SummaryJob.STATUS_PENDING).update(
+                        updated_at=timezone.now()
+                    )
+                except Exception:
+                    logger.exception("Could not record the heartbeat of queued in-memory uploads.")
+                finally:
+                    connections.close_all() # This thread's connections only
+
+        _buffer_heartbeat = threading.Thread(target=beat, name='job-buffer-heartbeat', daemon=True)
+        _buffer_heartbeat.start()
+
+
+def _spool_upload(uploaded_file) -> str:
+    """
+    Returns a uniquely named file in SUMMARIZER_JOB_DIR holding the upload. A file Django
+    has already streamed to disk is moved there (a rename on the same filesystem) rather
+    than copied; anything else is written out chunk by chunk.
+    """
+    job_dir = getattr(settings, 'SUMMARIZER_JOB_DIR', tempfile.gettempdir())
+    os.makedirs(job_dir, exist_ok=True)
+    fd, pdf_path = tempfile.mkstemp(suffix='.pdf', dir=job_dir)
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        os.close(fd)
+        file_move_safe(uploaded_file.temporary_file_path(), pdf_path, allow_overwrite=True)
+    else:
+        with os.fdopen(fd, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+    return pdf_path
+
+
+def _content_hash(pdf_path: str, pdf_data: bytes = None) -> str:
+    """
+    Returns the SHA-256 of an upload, read from pdf_data if it is in memory, else from pdf_path.
+    """
+    if pdf_data is not None:
+        return hashlib.sha256(pdf_data).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _get_document(uploaded_file, sha256: str, user=None, session_key: str = "") -> Document:
+    """
+    Returns the owner's Document for this content, creating it on the first upload, so
+    uploading the same PDF again adds to its history rather than starting a new one.
+    """
+    owner = {'user': user} if user is not None else {'user__isnull': True, 'session_key': session_key}
+    document = Document.objects.filter(sha256=sha256, **owner).first()
+    if document is None:
+        document = Document.objects.create(sha256=sha256, filename=uploaded_file.name, size=uploaded_file.size,
+                                           user=user, session_key="" if user is not None else session_key)
+    return document
+
+
+def create_job(uploaded_file, trace: bool = False, user=None, session_key: str = "") -> SummaryJob:
+    """
+    Records an uploaded PDF as a job and queues it for background processing.
+
+    Uploads up to FILE_UPLOAD_MAX_MEMORY_SIZE stay in memory and are handed to the worker as
+    bytes. Django streams larger ones to a unique file (FILE_UPLOAD_TEMP_DIR), which the job
+    takes over with a rename and the worker reads.
+
+    Args:
+        uploaded_file: A Django UploadedFile.
+        trace (bool): Record a per-stage timing trace with the job's result.
+        user: The authenticated user who owns the result, or None for an anonymous upload.
+        session_key (str): The uploader's session key, which owns anonymous uploads' results.
+
+    Returns:
+        SummaryJob: The newly created, pending job.
+    """
+    pdf_path, pdf_data = "", None
+    if hasattr(uploaded_file, 'temporary_file_path') or uploaded_file.size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        pdf_path = _spool_upload(uploaded_file)
+    else:
+        uploaded_file.seek(0)
+        pdf_data = uploaded_file.read()
+
+    document = _get_document(uploaded_file, _content_hash(pdf_path, pdf_data), user=user, session_key=session_key)
+    executor = _get_executor()
+    job = SummaryJob.objects.create(filename=uploaded_file.name, document=document, pdf_path=pdf_path,
+                                    trace_requested=trace)
+    if pdf_data is not None:
+        _upload_buffers[job.id] = pdf_data
+        _start_buffer_heartbeat()
+    transaction.on_commit(lambda: _submit(executor, job.id))
+    return job
@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+# --- Shared Gemini client ---
+# Pooled HTTP clients (keep-alive connections, timeouts, retries with backoff) for every LLM
+# feature, and a response cache keyed by (prompt template, summary), so asking twice for the
+# same thing is answered from the cache. GEMINI_API_BASE_URL can point at a local stub server.
+#
+# Under ASGI (asgi.py) the views await agenerate(), so the worker serves other requests while
+# the API is thinking; its async client lives as long as the server's event loop and is closed
+# by aclose() when the server shuts down. WSGI servers run each async view on a new event loop,
+# so there the views call generate() instead, which shares one thread-safe sync client.
+
+PROMPT_TEMPLATES = {
+    'expand': "Expand the following summary into a more detailed paragraph, keeping the core meaning:\n\n{summary}\n\nExpanded Summary:",
+    'keywords': "Extract key keywords or phrases from the following text, separated by commas:\n\n{summary}\n\nKeywords:",
+}
+
+# Responses retried (with exponential backoff, honouring Retry-After) like connection errors.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 0.5 # Seconds before the first retry; doubled for each further one
+MAX_RETRY_AFTER = 30 # Longest Retry-After (in seconds) waited for before giving up
+
+# An httpx.AsyncClient belongs to the event loop it was first used on, so each loop gets its
+# own client, and its own table of in-flight requests: requests for the same (template,
+# summary) that arrive while one is already running wait for it.
+_loop_state = weakref.WeakKeyDictionary()
+
+# The sync client and its in-flight requests (key -> concurrent.futures.Future), shared by all threads.
+_sync_client = None
+_sync_in_flight = {}
+_sync_lock = threading.Lock()
+
+
+class LLMResponseError(Exception):
+    """The API answered, but not with any generated text."""
+
+
+class LLMConfigurationError(Exception):
+    """The Gemini API is not configured (GEMINI_API_KEY is not set)."""
+
+
+def require_api_key() -> str:
+    """
+    Returns:
+        str: settings.GEMINI_API_KEY. Raises LLMConfigurationError when it is not set.
+    """
+    api_key = getattr(settings, 'GEMINI_API_KEY', None)
+    if not api_key:
+        raise LLMConfigurationError("GEMINI_API_KEY is not set; set it in the environment to enable the Gemini features.")
+    return api_key
+
+
+def _client_options() -> dict:
+    connect_timeout, read_timeout = getattr(settings, 'GEMINI_TIMEOUT', (5, 60))
+    pool_size = getattr(settings, 'GEMINI_POOL_SIZE', 10)
+    return {
+        'timeout': httpx.Timeout(read_timeout, connect=connect_timeout),
+        'limits': httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        'headers': {'Content-Type': 'application/json'},
+    }
+
+
+def _get_state() -> dict:
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _loop_state[loop] = {'client': httpx.AsyncClient(**_client_options()), 'in_flight': {}}
+    return state
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+async def aclose() -> None:
+    """
+    Closes the async client of the running event loop, e.g. when an ASGI server shuts down.
+    """
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state['client'].aclose()
+
+
+def close() -> None:
+    """
+    Closes the shared sync client. It is opened again on the next generate() call.
+    """
+    global _sync_client
+    with _sync_lock:
+        client, _sync_client = _sync_client, None
+    if client is not None:
+        client.close()
+
+
+def _cache_key(template_name: str, summary: str) -> str:
+    template = PROMPT_TEMPLATES[template_name]
+    template_hash = hashlib.sha256(f"{settings.GEMINI_MODEL}\0{template}".encode('utf-8')).hexdigest()[:16]
+    summary_hash = hashlib.sha256(summary.encode('utf-8')).hexdigest()
+    return f"llm:{template_name}:{template_hash}:{summary_hash}"
+
+
+def _response_text(result: dict) -> str:
+    candidates = result.get('candidates') or []
+    parts = []
+    if candidates:
+        parts = (candidates[0].get('content') or {}).get('parts') or []
+    if not parts or 'text' not in parts[0]:
+        raise LLMResponseError("The API did not return any generated text.")
+    return parts[0]['text']
+
+
+def _retry_delay(attempt: int, response: httpx.Response = None) -> float:
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(int(response.headers['Retry-After']), MAX_RETRY_AFTER)
+    return RETRY_BACKOFF * (2 ** attempt)
+
+
+def _request(template_name: str, summary: str) -> dict:
+    """The keyword arguments of the generateContent POST for a template and summary."""
+    prompt = PROMPT_TEMPLATES[template_name].format(summary=summary)
+    return {
+        'url': f"{settings.GEMINI_API_BASE_URL.rstrip('/')}/models/{settings.GEMINI_MODEL}:generateContent",
+        'json': {"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+        'headers': {'x-goog-api-key': require_api_key()},
+    }
+
+
+async def _call_api(template_name: str, summary: str) -> str:
+    request = _request(template_name, summary)
+    client = _get_state()['client']
+    retries = getattr(settings, 'GEMINI_MAX_RETRIES', 3)
+
+    for attempt in range(retries + 1):
+        try:
+            # generateContent has no side effects, so retrying a POST is safe.
+            response = await client.post(**request)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            await asyncio.sleep(_retry_delay(attempt, response))
+            continue
+        response.raise_for_status()
+        return _response_text(response.json())
+
+
+def _call_api_sync(template_name: str, summary: str) -> str:
+    """_call_api() on the shared sync client."""
+    request = _request(template_name, summary)
+    client = _get_sync_client()
+    retries = getattr(settings, 'GEMINI_MAX_RETRIES', 3)
+
+    for attempt in range(retries + 1):
+        try:
+            response = client.post(**request)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            time.sleep(_retry_delay(attempt))
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            time.sleep(_retry_delay(attempt, response))
+            continue
+        response.raise_for_status()
+        return _response_text(response.json())
+
+
+async def _fetch(key: str, template_name: str, summary: str) -> str:
+    text = await _call_api(template_name, summary)
+    await cache.aset(key, text, getattr(settings, 'LLM_CACHE_TIMEOUT', 24 * 60 * 60))
+    return text
+
+
+async def agenerate(template_name: str, summary: str) -> str:
+    """
+    Runs one of the PROMPT_TEMPLATES on a summary, answering from the cache when possible.
+
+    Args:
+        template_name (str): A key of PROMPT_TEMPLATES ('expand' or 'keywords').
+        summary (str): The summary text.
+
+    Returns:
+        str: The generated text.
+
+    Raises:
+        httpx.HTTPError: If the API could not be reached or returned an error.
+        LLMResponseError: If the API response contained no generated text.
+    """
+    key = _cache_key(template_name, summary)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached
+
+    in_flight = _get_state()['in_flight']
+    task = in_flight.get(key)
+    if task is None:
+        task = in_flight[key] = asyncio.ensure_future(_fetch(key, template_name, summary))
+        task.add_done_callback(lambda _: in_flight.pop(key, None))
+    # Shielded, so one waiting request being cancelled (client gone) does not cancel the call for the others.
+    return await asyncio.shield(task)
+
+
+async def agenerate_many(template_names: list, summary: str) -> dict:
+    """
+    Runs several PROMPT_TEMPLATES on the same summary concurrently.
+
+    Returns:
+        dict: Maps each template name to its generated text, or to the exception it raised.
+    """
+    results = await asyncio.gather(*(agenerate(name, summary) for name in template_names), return_exceptions=True)
+    return dict(zip(template_names, results))
+
+
+def generate(template_name: str, summary: str) -> str:
+    """
+    Synchronous agenerate(), for views served by a WSGI server and for scripts. Uses the shared
+    sync client; concurrent calls for the same (template, summary) wait for a single API call.
+    """
+    key = _cache_key(template_name, summary)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _sync_lock:
+        future = _sync_in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = _sync_in_flight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        text = _call_api_sync(template_name, summary)
+        cache.set(key, text, getattr(settings, 'LLM_CACHE_TIMEOUT', 24 * 60 * 60))
+        future.set_result(text)
+        return text
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _sync_lock:
+            _sync_in_flight.pop(key, None)
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='summaryjob',
+            name='pdf_path',
+            field=models.CharField(blank=True, max_length=1024),
+        ),
+    ]
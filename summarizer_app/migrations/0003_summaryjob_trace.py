@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer_app', '0002_alter_summaryjob_pdf_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='trace_requested',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='summaryjob',
+            name='trace',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,111 @@
+from django.conf import settings
 from django.db import models
 
 # Create your models here.
+
+
+class Document(models.Model):
+    """
+    An uploaded PDF, identified by the SHA-256 of its contents and owned by a user or, for
+    anonymous visitors, by their session. Result history is looked up through it.
+    """
+    sha256 = models.CharField(max_length=64)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE,
+                             related_name='documents')
+    session_key = models.CharField(max_length=40, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['sha256', 'user']),
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['session_key', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.sha256[:12]})"
+
+
+class Summary(models.Model):
+    """
+    A finished summary of a Document, as listed in the result history and served by downloads.
+    """
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='summaries')
+    text = models.TextField()
+    detected_language = models.CharField(max_length=16, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['document', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Summary of {self.document_id} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class SummaryJob(models.Model):
+    """
+    A summarization request for one uploaded PDF, processed in the background by the
+    worker pool in summarizer_app.jobs.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    filename = models.CharField(max_length=255)
+    document = models.ForeignKey(Document, null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
+    # The upload, spooled to a file in SUMMARIZER_JOB_DIR; removed once the job is processed.
+    pdf_path = models.CharField(max_length=1024, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    # The job pool that claimed the job (see jobs._new_pool_id); only that pool breaking fails it.
+    worker = models.CharField(max_length=64, blank=True)
+    detected_language = models.CharField(max_length=16, blank=True)
+    summary = models.TextField(blank=True)
+    error_message = models.TextField(blank=True)
+    # Set on upload (trace=1) to record a per-stage timing trace, returned with the result.
+    trace_requested = models.BooleanField(default=False)
+    trace = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class SummaryPart(models.Model):
+    """
+    The summary of one chunk of a running job, recorded as soon as the worker produces it so
+    it can be streamed to the browser (see views.job_stream). Removed once the job finishes
+    and its full summary is on the SummaryJob.
+    """
+    job = models.ForeignKey(SummaryJob, on_delete=models.CASCADE, related_name='parts')
+    index = models.PositiveIntegerField()
+    text = models.TextField()
+
+    class Meta:
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='unique_summary_part'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}:{self.index}"
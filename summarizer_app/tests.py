@@ -1,3 +1,815 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+import batch_summarize
+import document_pipeline
+import metrics
+import numpy as np
+import text_extractor
+from benchmarks.stand_in_model import StandInSummarizationPipeline, install_stand_in
+from benchmarks.synthetic_pdf import write_synthetic_pdf, write_text_pdf
+from model_registry import register_pipeline
+from result_cache import ResultCache
+from summarizer import DocumentSummarizer
+from text_chunker import TokenChunker
+from summarizer_app import jobs, llm_client
+from summarizer_app.models import Summary, SummaryJob
+
+ENGLISH_SENTENCES = [
+    "The committee reviewed the annual budget and approved funding for three new research programs.",
+    "Revenue grew steadily over the year, driven mostly by demand in the northern regions.",
+    "Engineers replaced the aging pumps, which cut the plant's energy use by a fifth.",
+    "The report recommends a second survey before any decision on the new site is made.",
+]
+FRENCH_SENTENCES = [
+    "Le comité a examiné le budget annuel et a approuvé le financement de trois nouveaux programmes.",
+    "Les recettes ont augmenté régulièrement au cours de l'année, surtout dans les régions du nord.",
+    "Les ingénieurs ont remplacé les vieilles pompes, ce qui a réduit la consommation d'énergie.",
+    "Le rapport recommande une seconde étude avant toute décision sur le nouveau site.",
+]
+
+
+def _pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('pipeline-') and thread.is_alive()]
+
+
+def _split_sentences(text, language='english'):
+    """
+    Stands in for nltk's sent_tokenize, whose punkt data is downloaded on first use; the
+    tests' sentences all end in '.', so this splits them the same way without the network.
+    """
+    return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text.strip()) if sentence]
+
+
+class OfflineSentencesMixin:
+    """Runs a test class with _split_sentences in place of sent_tokenize."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for module in ('document_pipeline', 'summarizer'):
+            patcher = mock.patch(f'{module}.sent_tokenize', _split_sentences)
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+
+
+class RecordingTranslator:
+    """Stands in for DocumentTranslator: records what it is asked to translate."""
+    model_name = "test/recording-translator"
+
+    def __init__(self):
+        self.calls = []
+
+    def can_translate(self, source_lang):
+        return True
+
+    def translate_to_english(self, text, source_lang):
+        self.calls.append((source_lang, text))
+        return f"Translated from {source_lang}. " + text
+
+
+class FailingTranslator(RecordingTranslator):
+    def translate_to_english(self, text, source_lang):
+        raise RuntimeError("translation model crashed")
+
+
+class FailingSummarizationPipeline(StandInSummarizationPipeline):
+    """The stand-in model, failing on every input (like a model running out of memory)."""
+
+    def __call__(self, inputs, **kwargs):
+        raise RuntimeError("model failed")
+
+
+def _failing_summarizer():
+    register_pipeline("summarization", "test/failing", FailingSummarizationPipeline())
+    return DocumentSummarizer(model_name="test/failing")
+
+
+class DocumentPipelineTests(OfflineSentencesMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.summarizer = DocumentSummarizer(model_name=install_stand_in())
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.long_pdf = os.path.join(cls.tmp_dir.name, 'long.pdf')
+        write_synthetic_pdf(cls.long_pdf, 100, ENGLISH_SENTENCES)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+        super().tearDownClass()
+
+    def run_in_thread(self, *args, **kwargs):
+        """Runs run_pipeline with a deadline; returns (result, exception) or fails if it hangs."""
+        outcome = {}
+
+        def target():
+            try:
+                outcome['result'] = document_pipeline.run_pipeline(*args, **kwargs)
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout=120)
+        self.assertFalse(thread.is_alive(), "run_pipeline did not return")
+        return outcome.get('result'), outcome.get('error')
+
+    def test_summarizes_a_document(self):
+        result, error = self.run_in_thread(self.long_pdf, self.summarizer)
+        self.assertIsNone(error)
+        extracted_text, language, summary = result
+        self.assertEqual(language, 'en')
+        self.assertIn(ENGLISH_SENTENCES[0][:40], extracted_text)
+        self.assertTrue(summary)
+
+    def test_failing_stage_stops_the_pipeline(self):
+        # Every section is reported as French, so the translator runs (and fails) on the first block
+        # while the extractor still has most of the 100 pages to hand on.
+        with mock.patch.object(document_pipeline, 'detect_language_sections',
+                               side_effect=lambda text, **kwargs: [{'start': 0, 'end': len(text), 'language': 'fr'}]):
+            result, error = self.run_in_thread(self.long_pdf, self.summarizer, FailingTranslator())
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(_pipeline_threads(), [])
+
+    def test_failing_callback_stops_the_pipeline(self):
+        def on_summary(parts):
+            raise ValueError("client went away")
+
+        result, error = self.run_in_thread(self.long_pdf, self.summarizer, on_summary=on_summary)
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(_pipeline_threads(), [])
+
+    def test_translates_each_section_from_its_own_language(self):
+        pdf_path = os.path.join(self.tmp_dir.name, 'mixed.pdf')
+        write_text_pdf(pdf_path, [ENGLISH_SENTENCES * 10] * 3 + [FRENCH_SENTENCES * 10] * 3)
+        translator = RecordingTranslator()
+
+        result, error = self.run_in_thread(pdf_path, self.summarizer, translator)
+        self.assertIsNone(error)
+        self.assertTrue(translator.calls)
+        self.assertEqual({language for language, _ in translator.calls}, {'fr'})
+        translated = " ".join(text for _, text in translator.calls)
+        self.assertIn("comité", translated)
+        self.assertNotIn("committee", translated)
+
+    def test_extractive_budget_limits_the_text_summarized(self):
+        full, _ = self.run_in_thread(self.long_pdf, self.summarizer)
+        filtered, error = self.run_in_thread(self.long_pdf, self.summarizer, extractive_budget=300)
+        self.assertIsNone(error)
+        chunks = []
+        self.run_in_thread(self.long_pdf, self.summarizer, extractive_budget=300, on_summary=chunks.extend)
+        self.assertEqual(len(chunks), 1)
+        self.assertLess(len(filtered[2]), len(full[2]))
+
+
+def _fake_recognize(binary):
+    """Stands in for Tesseract in OCR worker processes: reports the page it got and who read it."""
+    return f"{binary.shape[1]}x{binary.shape[0]} {int(binary.min())}-{int(binary.max())} pid={os.getpid()}", 90.0
+
+
+class TextExtractorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+        super().tearDownClass()
+
+    def pdf(self, name, pages):
+        path = os.path.join(self.tmp_dir.name, name)
+        write_text_pdf(path, pages)
+        return path
+
+    def test_only_text_poor_pages_are_ocred(self):
+        path = self.pdf('mixed.pdf', [ENGLISH_SENTENCES, [], ["Page 3"], ENGLISH_SENTENCES])
+        ocr_requests = []
+
+        def fake_ocr(pdf_path, page_indices, **kwargs):
+            ocr_requests.append(list(page_indices))
+            for i in page_indices:
+                yield i, f"OCR text of page {i + 1}", 80.0
+
+        confidence = {}
+        with mock.patch.object(text_extractor, '_iter_ocr_pdf_pages', fake_ocr):
+            pages = list(text_extractor.iter_pdf_pages(path, ocr_confidence=confidence))
+        self.assertEqual(ocr_requests, [[1, 2]])
+        self.assertEqual([i for i, _ in pages], [0, 1, 2, 3])
+        self.assertIn(ENGLISH_SENTENCES[0], pages[0][1])
+        self.assertEqual(pages[1][1], "OCR text of page 2")
+        self.assertEqual(pages[2][1], "OCR text of page 3") # Longer than its native text
+        self.assertEqual(confidence, {1: 80.0, 2: 80.0})
+
+    def test_parallel_extraction_keeps_page_order(self):
+        path = self.pdf('numbered.pdf', [[f"Page number {i}"] for i in range(20)])
+        with mock.patch.object(text_extractor, 'PARALLEL_NATIVE_MIN_PAGES', 8), \
+                mock.patch.object(text_extractor, 'NATIVE_RANGE_MIN_PAGES', 3):
+            backend = text_extractor.resolve_native_backend()
+            parallel = text_extractor._extract_pages_parallel(path, backend, workers=2)
+            small = text_extractor._extract_pages_parallel(self.pdf('small.pdf', [["One"]] * 4), backend, workers=2)
+        self.assertEqual(parallel, text_extractor.extract_native_pages(path, workers=1))
+        self.assertEqual([text.strip() for text in parallel], [f"Page number {i}" for i in range(20)])
+        self.assertIsNone(small) # Too small to split
+
+    def test_binarize_separates_ink_from_paper(self):
+        rng = np.random.default_rng(0)
+        pixels = np.where(rng.random((40, 60)) < 0.3, rng.integers(20, 60, (40, 60)),
+                          rng.integers(180, 240, (40, 60))).astype(np.uint8)
+        binary = text_extractor._binarize(pixels)
+        self.assertEqual(set(np.unique(binary)), {0, 255})
+        np.testing.assert_array_equal(binary == 0, pixels < 60)
+        blank = text_extractor._binarize(np.full((10, 10), 255, dtype=np.uint8))
+        self.assertEqual(blank.shape, (10, 10))
+
+    def test_page_windows_group_consecutive_pages(self):
+        self.assertEqual(text_extractor._page_windows([10, 0, 1, 2, 3, 4, 8, 7], 3),
+                         [[0, 1, 2], [3, 4], [7, 8], [10]])
+        self.assertEqual(text_extractor._page_windows([], 3), [])
+
+    def test_ocr_data_to_text_rebuilds_lines_and_blocks(self):
+        data = {
+            'text':      ["",  "Hello", "world", "second", "line", "noise", "  ", "New", "block"],
+            'conf':      [-1,  90,      80,      70,       60,     -1,      50,   100,   100],
+            'block_num': [1,   1,       1,       1,        1,      1,       1,    2,     2],
+            'par_num':   [1,   1,       1,       1,        1,      1,       1,    1,     1],
+            'line_num':  [1,   1,       1,       2,        2,      2,       2,    1,     1],
+        }
+        text, confidence = text_extractor._ocr_data_to_text(data)
+        self.assertEqual(text, "Hello world\nsecond line\n\nNew block")
+        self.assertAlmostEqual(confidence, (90 + 80 + 70 + 60 + 100 + 100) / 6)
+        self.assertEqual(text_extractor._ocr_data_to_text({k: [] for k in data}), ("", 0.0))
+
+    def test_ocr_pool_is_reused_across_documents(self):
+        text_extractor.shutdown_ocr_pool()
+        self.addCleanup(text_extractor.shutdown_ocr_pool)
+        pages = [(i, Image.new("L", (30 + i, 20), color=255)) for i in range(4)]
+        with mock.patch.object(text_extractor, '_recognize', _fake_recognize):
+            first = sorted(text_extractor._iter_ocr_results(iter(pages), ocr_workers=2))
+            pool = text_extractor._ocr_pool
+            second = sorted(text_extractor._iter_ocr_results(iter(pages), ocr_workers=2))
+        self.assertIs(text_extractor._ocr_pool, pool)
+        for results in (first, second):
+            self.assertEqual([(i, error) for i, _, _, error in results], [(i, None) for i in range(4)])
+            # Each page reached a worker intact, through shared memory.
+            self.assertEqual([text.split(" pid=")[0] for _, text, _, _ in results],
+                             [f"{30 + i}x20 255-255" for i in range(4)])
+        worker_pids = {int(text.split("pid=")[1]) for _, text, _, _ in first + second}
+        self.assertTrue(worker_pids <= set(pool._processes))
+        self.assertNotIn(os.getpid(), worker_pids)
+
+
+def _fake_summarize_file(path, sha256):
+    """Stands in for batch_summarize._summarize_file in the batch's worker processes."""
+    with open(path + ".attempts", 'a') as attempts:
+        attempts.write("x")
+    if path.endswith("crash.pdf"):
+        os._exit(1) # A worker killed mid-document, e.g. by the OOM killer
+    record = batch_summarize._new_record(path, sha256)
+    record.update(summary=f"Summary of {os.path.basename(path)}", pages=1)
+    return record
+
+
+class BatchSummarizeTests(SimpleTestCase):
+    OPTIONS = {'min_length': 50, 'max_length': 200, 'hierarchical': False, 'extractive_budget': None,
+               'translate': True, 'quantize': False, 'tesseract_cmd': None}
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.dir = tmp_dir.name
+        self.output = os.path.join(self.dir, 'summaries.jsonl')
+        patcher = mock.patch.object(batch_summarize, '_summarize_file', _fake_summarize_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pdf(self, name, content=None):
+        path = os.path.join(self.dir, name)
+        with open(path, 'wb') as file:
+            file.write(content or f"%PDF-1.4 {name}".encode())
+        return path
+
+    def run_batch(self, paths, workers=1, **options):
+        with redirect_stdout(io.StringIO()):
+            batch_summarize.run_batch(paths, self.output, self.output + ".manifest", workers,
+                                      dict(self.OPTIONS, **options))
+
+    def records(self):
+        if not os.path.exists(self.output):
+            return {}
+        with open(self.output, encoding='utf-8') as output:
+            return {os.path.basename(record['path']): record for record in map(json.loads, output)}
+
+    def attempts(self, path):
+        with open(path + ".attempts") as attempts:
+            return len(attempts.read())
+
+    def test_duplicates_and_finished_documents_are_skipped(self):
+        paths = [self.pdf('a.pdf'), self.pdf('b.pdf'), self.pdf('copy_of_a.pdf', b"%PDF-1.4 a.pdf")]
+        self.run_batch(paths)
+        self.assertEqual(sorted(self.records()), ['a.pdf', 'b.pdf'])
+        self.run_batch(paths) # Everything is in the manifest now
+        self.assertEqual(self.attempts(paths[0]), 1)
+        self.assertEqual(self.attempts(paths[1]), 1)
+
+    def test_manifest_is_keyed_by_summary_options(self):
+        path = self.pdf('a.pdf')
+        self.run_batch([path])
+        self.run_batch([path], max_length=100)
+        self.run_batch([path], tesseract_cmd='/opt/tesseract') # Does not change the summary
+        self.assertEqual(self.attempts(path), 2)
+        with open(self.output + ".manifest") as manifest:
+            entries = manifest.read().split()
+        sha256 = batch_summarize.file_sha256(path)
+        self.assertEqual(entries, [sha256, batch_summarize.options_key(self.OPTIONS),
+                                   sha256, batch_summarize.options_key(dict(self.OPTIONS, max_length=100))])
+
+    def test_broken_pool_is_replaced_and_the_batch_continues(self):
+        paths = [self.pdf('first.pdf'), self.pdf('crash.pdf')] + [self.pdf(f'doc{i}.pdf') for i in range(3)]
+        self.run_batch(paths)
+        records = self.records()
+        self.assertEqual(sorted(records), sorted(os.path.basename(path) for path in paths))
+        self.assertTrue(records['crash.pdf']['error'].startswith("BrokenProcessPool"))
+        self.assertEqual(self.attempts(paths[1]), batch_summarize.POOL_ATTEMPTS)
+        self.assertIsNone(records['first.pdf']['error'])
+        self.assertIsNone(records['doc2.pdf']['error']) # Submitted after the crashes
+        with open(self.output + ".manifest") as manifest:
+            recorded = {line.split()[0] for line in manifest}
+        self.assertEqual(recorded, {record['sha256'] for record in records.values() if not record['error']})
+
+    def test_unreadable_file_gets_an_error_record(self):
+        paths = [self.pdf('a.pdf'), os.path.join(self.dir, 'gone.pdf'), self.pdf('b.pdf')]
+        self.run_batch(paths)
+        records = self.records()
+        self.assertTrue(records['gone.pdf']['error'].startswith("FileNotFoundError"))
+        self.assertIsNone(records['a.pdf']['error'])
+        self.assertIsNone(records['b.pdf']['error'])
+
+
+class TokenChunkerTests(SimpleTestCase):
+    def test_whitespace_only_sentence_is_dropped(self):
+        self.assertEqual(TokenChunker(None).chunk(['a' * 10, ' ' * 4000]), ['a' * 10])
+
+    def test_long_run_without_spaces_is_split_without_losing_text(self):
+        chunker = TokenChunker(None, max_tokens=20)
+        run = "".join(chr(ord('a') + i % 26) for i in range(300))
+        chunks = chunker.chunk(["A short sentence.", run, "The end."])
+        self.assertTrue(all(chunker.fits(chunk) for chunk in chunks))
+        self.assertEqual(chunks[0], "A short sentence.")
+        self.assertEqual(" ".join(chunks[1:]).replace(" ", "").replace("Theend.", ""), run)
+        self.assertTrue(chunks[-1].endswith("The end."))
+
+
+class SummaryCacheTests(OfflineSentencesMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmp_dir.name, 'doc.pdf')
+        write_synthetic_pdf(cls.pdf_path, 3, ENGLISH_SENTENCES)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache = ResultCache(path=os.path.join(self.tmp_dir.name, f'{self._testMethodName}.sqlite3'))
+        metrics.reset()
+
+    def summarize(self, summarizer):
+        with mock.patch.object(jobs, '_get_components', return_value=(summarizer, None, self.cache)):
+            return jobs._summarize_pdf(self.pdf_path)
+
+    def test_result_cache_round_trip(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.put('key', "extracted", "en", "summary")
+        self.assertEqual(self.cache.get('key'), {'extracted_text': "extracted", 'language': "en", 'summary': "summary"})
+
+    def test_second_request_is_a_cache_hit(self):
+        summarizer = DocumentSummarizer(model_name=install_stand_in())
+        first = self.summarize(summarizer)
+        self.assertIsNone(first[2])
+        self.assertTrue(first[0])
+        with mock.patch.object(document_pipeline, 'iter_pdf_pages', side_effect=AssertionError("not cached")):
+            second = self.summarize(summarizer)
+        self.assertEqual(second, first)
+        counters = dict(metrics.drain()['counters'])
+        self.assertEqual(counters[('cache_requests_total', (('result', 'miss'),))], 1)
+        self.assertEqual(counters[('cache_requests_total', (('result', 'hit'),))], 1)
+
+    def test_cache_key_covers_the_summarization_settings(self):
+        summarizer = DocumentSummarizer(model_name=install_stand_in())
+        self.summarize(summarizer)
+        with override_settings(SUMMARIZER_MAX_LENGTH=120):
+            self.summarize(summarizer)
+        summarizer.quantize = True
+        self.summarize(summarizer)
+        counters = dict(metrics.drain()['counters'])
+        self.assertEqual(counters[('cache_requests_total', (('result', 'miss'),))], 3)
+        self.assertNotIn(('cache_requests_total', (('result', 'hit'),)), counters)
+
+    def test_failed_summary_is_not_cached(self):
+        summary, _, error_message = self.summarize(_failing_summarizer())
+        self.assertEqual(summary, "")
+        self.assertIsNone(error_message) # run_summary_job turns the empty summary into a failure
+        summary, _, _ = self.summarize(_failing_summarizer())
+        self.assertEqual(summary, "")
+        counters = dict(metrics.drain()['counters'])
+        self.assertEqual(counters[('cache_requests_total', (('result', 'miss'),))], 2)
+        self.assertNotIn(('cache_requests_total', (('result', 'hit'),)), counters)
+
+    def test_generate_summary_returns_empty_string_on_failure(self):
+        self.assertEqual(DocumentSummarizer(model_name=install_stand_in()).generate_summary("Too short."), "")
+        self.assertEqual(_failing_summarizer().generate_summary(" ".join(ENGLISH_SENTENCES * 20)), "")
+
+
+class WebTestCase(TransactionTestCase):
+    """
+    Uploads go to a temporary job directory and are recorded as jobs without being run.
+    A TransactionTestCase, since the async views write to the database from their own threads.
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.job_dir = tmp_dir.name
+        settings_override = override_settings(SUMMARIZER_JOB_DIR=self.job_dir, FILE_UPLOAD_TEMP_DIR=self.job_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for name in ('_get_executor', '_submit', '_start_buffer_heartbeat'):
+            patcher = mock.patch.object(jobs, name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(jobs._upload_buffers.clear)
+
+    def upload(self, client, name='doc.pdf', content=b"%PDF-1.4 test upload"):
+        response = client.post('/', {'pdf_file': SimpleUploadedFile(name, content)})
+        self.assertEqual(response.status_code, 302)
+        return SummaryJob.objects.get(pk=client.session['last_job_id'])
+
+    def finish(self, job, summary="A finished summary."):
+        """Marks a job done, as run_summary_job would."""
+        job.status = SummaryJob.STATUS_DONE
+        job.summary = summary
+        job.save()
+        return Summary.objects.create(document=job.document, text=summary)
+
+
+class UploadTests(WebTestCase):
+    def test_small_upload_stays_in_memory(self):
+        content = b"%PDF-1.4 small upload"
+        job = self.upload(self.client, 'small.pdf', content)
+        self.assertEqual(job.pdf_path, "")
+        self.assertEqual(jobs._upload_buffers[job.id], content)
+        self.assertEqual(os.listdir(self.job_dir), [])
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=16)
+    def test_large_upload_is_spooled_to_the_job_directory(self):
+        content = b"%PDF-1.4 an upload over the in-memory limit"
+        job = self.upload(self.client, 'large.pdf', content)
+        self.assertNotIn(job.id, jobs._upload_buffers)
+        self.assertEqual(os.listdir(self.job_dir), [os.path.basename(job.pdf_path)])
+        with open(job.pdf_path, 'rb') as spooled:
+            self.assertEqual(spooled.read(), content)
+
+
+class JobOwnershipTests(WebTestCase):
+    def job_urls(self, job):
+        return [f'/jobs/{job.id}/status/', f'/jobs/{job.id}/result/', f'/jobs/{job.id}/stream/']
+
+    def test_owner_session_can_read_its_job(self):
+        job = self.upload(self.client)
+        self.finish(job)
+        for url in self.job_urls(job)[:2]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/result/').json()['summary'], "A finished summary.")
+
+    def test_stream_is_served_only_under_asgi(self):
+        job = self.upload(self.client)
+        pending_page = self.client.get('/summary/')
+        self.assertNotContains(pending_page, 'data-stream-url') # The WSGI page polls the job status
+        self.assertEqual(self.client.get(f'/jobs/{job.id}/stream/').status_code, 501)
+
+        async_client = AsyncClient()
+        async_client.cookies = self.client.cookies
+        self.assertContains(async_to_sync(async_client.get)('/summary/'), f'data-stream-url="/jobs/{job.id}/stream/"')
+        self.finish(job)
+        response = async_to_sync(async_client.get)(f'/jobs/{job.id}/stream/')
+        self.assertEqual(response.status_code, 200)
+
+        async def read(response):
+            return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        self.assertIn('event: done', async_to_sync(read)(response))
+
+    def test_foreign_session_gets_404(self):
+        job = self.upload(self.client)
+        self.finish(job)
+        other = Client()
+        self.upload(other, 'other.pdf') # A session with uploads of its own
+        self.assertNotEqual(other.session.session_key, self.client.session.session_key)
+        for url in self.job_urls(job):
+            self.assertEqual(other.get(url).status_code, 404, url)
+        self.assertEqual(Client().get(self.job_urls(job)[0]).status_code, 404) # No session at all
+
+    def test_foreign_user_gets_404(self):
+        owner = User.objects.create_user('owner', password='secret')
+        intruder = User.objects.create_user('intruder', password='secret')
+        self.client.force_login(owner)
+        job = self.upload(self.client)
+        self.finish(job)
+        self.assertEqual(job.document.user, owner)
+        other = Client()
+        other.force_login(intruder)
+        for url in self.job_urls(job):
+            self.assertEqual(other.get(url).status_code, 404, url)
+        # The owner can still read it after signing in from another browser.
+        elsewhere = Client()
+        elsewhere.force_login(owner)
+        self.assertEqual(elsewhere.get(self.job_urls(job)[1]).status_code, 200)
+
+
+class SummaryHistoryTests(WebTestCase):
+    def test_download_streams_the_stored_text(self):
+        text = "A long finished summary. " * 50
+        summary = self.finish(self.upload(self.client), text)
+        with override_settings(SUMMARIZER_DOWNLOAD_CHUNK_CHARS=100):
+            response = self.client.get(f'/summaries/{summary.id}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content).decode(), text)
+
+    def test_history_is_paginated_newest_first(self):
+        for number in range(5):
+            self.finish(self.upload(self.client, f'doc{number}.pdf', f"%PDF-1.4 upload {number}".encode()),
+                        f"Summary {number}.")
+        with override_settings(SUMMARIZER_HISTORY_PAGE_SIZE=2):
+            pages = [self.client.get('/history/', {'page': number}).context['page'] for number in (1, 2, 3)]
+        self.assertEqual([[item.preview for item in page] for page in pages],
+                         [["Summary 4.", "Summary 3."], ["Summary 2.", "Summary 1."], ["Summary 0."]])
+        self.assertEqual(pages[0].paginator.num_pages, 3)
+
+    def test_foreign_session_cannot_see_or_download(self):
+        summary = self.finish(self.upload(self.client))
+        other = Client()
+        self.upload(other, 'other.pdf')
+        self.assertEqual(other.get(f'/summaries/{summary.id}/download/').status_code, 404)
+        self.assertEqual(list(other.get('/history/').context['page']), [])
+        self.assertEqual(len(self.client.get('/history/').context['page']), 1)
+
+    def test_foreign_user_cannot_see_or_download(self):
+        owner = User.objects.create_user('owner', password='secret')
+        intruder = User.objects.create_user('intruder', password='secret')
+        self.client.force_login(owner)
+        summary = self.finish(self.upload(self.client))
+        other = Client()
+        other.force_login(intruder)
+        self.assertEqual(other.get(f'/summaries/{summary.id}/download/').status_code, 404)
+        self.assertEqual(list(other.get('/history/').context['page']), [])
+
+
+class MetricsEndpointTests(TestCase):
+    def test_disabled_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(SUMMARIZER_METRICS_ENABLED=True)
+    def test_only_allowed_addresses_and_staff_can_scrape(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200) # The test client is 127.0.0.1
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 200)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(jobs, '_submit')
+        self.submit = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.reset_executor)
+
+    def reset_executor(self):
+        if jobs._executor is not None:
+            jobs._executor.shutdown()
+        jobs._executor = None
+
+    def submitted_job_ids(self):
+        return sorted(call.args[1] for call in self.submit.call_args_list)
+
+    def test_broken_pool_requeues_jobs_that_had_not_started(self):
+        running = SummaryJob.objects.create(filename='crashed.pdf', status=SummaryJob.STATUS_RUNNING, worker='pool-a')
+        # Running in another server process's pool, which is fine.
+        elsewhere = SummaryJob.objects.create(filename='elsewhere.pdf', status=SummaryJob.STATUS_RUNNING,
+                                              worker='pool-b')
+        queued = [SummaryJob.objects.create(filename=f'queued{i}.pdf', pdf_path=f'/uploads/queued{i}.pdf') for i in range(2)]
+        broken_pool = object()
+        jobs._executor = broken_pool
+        jobs._pool_ids[broken_pool] = 'pool-a'
+
+        # Every future of the broken pool fails, the crashed job's and the queued ones'.
+        for job in [running] + queued:
+            future = Future()
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+            jobs._on_job_finished(job.id, broken_pool, future)
+
+        running.refresh_from_db()
+        elsewhere.refresh_from_db()
+        self.assertEqual(running.status, SummaryJob.STATUS_FAILED)
+        self.assertEqual(elsewhere.status, SummaryJob.STATUS_RUNNING)
+        for job in queued:
+            job.refresh_from_db()
+            self.assertEqual(job.status, SummaryJob.STATUS_PENDING)
+        self.assertEqual(self.submitted_job_ids(), [job.id for job in queued]) # Each once, to the new pool
+        self.assertIsNot(jobs._executor, broken_pool)
+
+    def test_other_worker_errors_fail_only_their_job(self):
+        job = SummaryJob.objects.create(filename='doc.pdf', status=SummaryJob.STATUS_RUNNING)
+        other = SummaryJob.objects.create(filename='other.pdf', status=SummaryJob.STATUS_RUNNING)
+        future = Future()
+        future.set_exception(RuntimeError("result could not be sent back"))
+        jobs._on_job_finished(job.id, None, future)
+        job.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(job.status, SummaryJob.STATUS_FAILED)
+        self.assertEqual(other.status, SummaryJob.STATUS_RUNNING)
+
+    def test_new_pool_requeues_stale_running_jobs(self):
+        stale = SummaryJob.objects.create(filename='stale.pdf', status=SummaryJob.STATUS_RUNNING, pdf_path='/uploads/stale.pdf')
+        SummaryJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        recent = SummaryJob.objects.create(filename='recent.pdf', status=SummaryJob.STATUS_RUNNING)
+
+        jobs._get_executor()
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, SummaryJob.STATUS_PENDING)
+        self.assertEqual(recent.status, SummaryJob.STATUS_RUNNING)
+        self.assertEqual(self.submitted_job_ids(), [stale.id])
+
+    def test_new_pool_runs_only_in_memory_uploads_it_holds(self):
+        held = SummaryJob.objects.create(filename='held.pdf')
+        jobs._upload_buffers[held.id] = b"%PDF-1.4 held"
+        self.addCleanup(jobs._upload_buffers.clear)
+        elsewhere = SummaryJob.objects.create(filename='elsewhere.pdf') # Held by another live server process
+        lost = SummaryJob.objects.create(filename='lost.pdf')
+        SummaryJob.objects.filter(pk=lost.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+        jobs._get_executor()
+        elsewhere.refresh_from_db()
+        lost.refresh_from_db()
+        self.assertEqual(self.submitted_job_ids(), [held.id])
+        self.assertEqual(elsewhere.status, SummaryJob.STATUS_PENDING)
+        self.assertEqual(lost.status, SummaryJob.STATUS_FAILED)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """A TransactionTestCase, since the heartbeat writes to the database from its own thread."""
+
+    @override_settings(SUMMARIZER_JOB_HEARTBEAT_SECONDS=0.05)
+    def test_running_job_keeps_its_heartbeat(self):
+        job = SummaryJob.objects.create(filename='long.pdf', status=SummaryJob.STATUS_RUNNING)
+        started = timezone.now()
+        SummaryJob.objects.filter(pk=job.pk).update(updated_at=started - timedelta(days=1))
+        with jobs._heartbeat(job.id):
+            time.sleep(0.3)
+        job.refresh_from_db()
+        self.assertGreaterEqual(job.updated_at, started) # So a new pool does not run it again
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """
+    Answers generateContent with the next of the server's scripted responses:
+    (status, headers, delay in seconds); a 200 carries the generated text 'stub answer'.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.calls.append(self.headers.get('x-goog-api-key'))
+        status, headers, delay = self.server.responses.pop(0) if self.server.responses else (200, {}, 0)
+        time.sleep(delay)
+        body = b''
+        if status == 200:
+            body = json.dumps({'candidates': [{'content': {'parts': [{'text': 'stub answer'}]}}]}).encode()
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The client gave up waiting (timeout tests)
+
+
+class GeminiClientTests(SimpleTestCase):
+    """llm_client against a local stub server: retries with backoff on 429/5xx, and timeouts."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeminiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.calls = []
+        self.server.responses = []
+        settings_override = override_settings(
+            GEMINI_API_BASE_URL=f"http://127.0.0.1:{self.server.server_port}/v1beta",
+            GEMINI_API_KEY='test-key', GEMINI_TIMEOUT=(1, 0.5), GEMINI_MAX_RETRIES=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The clients keep the timeouts they were created with.
+        llm_client.close()
+        self.addCleanup(llm_client.close)
+        cache.clear()
+        self.delays = []
+        retry_delay = llm_client._retry_delay
+
+        def recording_retry_delay(*args, **kwargs):
+            self.delays.append(retry_delay(*args, **kwargs))
+            return self.delays[-1]
+
+        for patcher in (mock.patch.object(llm_client, 'RETRY_BACKOFF', 0.01),
+                        mock.patch.object(llm_client, '_retry_delay', recording_retry_delay)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_retries_429_and_5xx_with_backoff(self):
+        self.server.responses = [(503, {}, 0), (429, {}, 0)]
+        self.assertEqual(llm_client.generate('expand', "A summary."), 'stub answer')
+        self.assertEqual(self.server.calls, ['test-key'] * 3)
+        self.assertEqual(self.delays, [0.01, 0.02])
+
+    def test_retry_after_header_sets_the_delay(self):
+        self.server.responses = [(429, {'Retry-After': '0'}, 0)]
+        self.assertEqual(llm_client.generate('expand', "A summary."), 'stub answer')
+        self.assertEqual(self.delays, [0])
+
+    def test_gives_up_after_max_retries(self):
+        self.server.responses = [(500, {}, 0)] * 3
+        with self.assertRaises(httpx.HTTPStatusError):
+            llm_client.generate('expand', "A summary.")
+        self.assertEqual(len(self.server.calls), 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.responses = [(400, {}, 0)]
+        with self.assertRaises(httpx.HTTPStatusError):
+            llm_client.generate('expand', "A summary.")
+        self.assertEqual(len(self.server.calls), 1)
+
+    def test_timeouts_are_retried_then_raised(self):
+        self.server.responses = [(200, {}, 2)] * 3
+        with self.assertRaises(httpx.TimeoutException):
+            llm_client.generate('expand', "A summary.")
+        self.assertEqual(len(self.server.calls), 3)
+
+    def test_async_client_retries_and_caches(self):
+        async def generate_twice():
+            try:
+                return [await llm_client.agenerate('keywords', "A summary.") for _ in range(2)]
+            finally:
+                await llm_client.aclose()
+
+        self.server.responses = [(502, {}, 0)]
+        self.assertEqual(async_to_sync(generate_twice)(), ['stub answer'] * 2)
+        self.assertEqual(len(self.server.calls), 2)
+
+    def test_missing_api_key_fails_clearly(self):
+        with override_settings(GEMINI_API_KEY=''):
+            with self.assertRaises(llm_client.LLMConfigurationError):
+                llm_client.generate('expand', "A summary.")
+            response = Client().post('/expand_summary/', json.dumps({'summary': "A summary."}),
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.calls, [])
@@ -4,6 +4,13 @@ from . import views
 urlpatterns = [
     path('', views.upload_pdf, name='upload_pdf'),
     path('summary/', views.display_summary, name='display_summary'),
+    path('history/', views.summary_history, name='summary_history'), # Paginated past summaries
+    path('summaries/<int:summary_id>/download/', views.download_summary, name='download_summary'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'), # Polled by the summary page
+    path('jobs/<int:job_id>/result/', views.job_result, name='job_result'),
+    path('jobs/<int:job_id>/stream/', views.job_stream, name='job_stream'), # Server-sent chunk summaries
     path('expand_summary/', views.expand_summary, name='expand_summary'), # New endpoint for expanding summary
     path('generate_keywords/', views.generate_keywords, name='generate_keywords'), # New endpoint for generating keywords
+    path('summary_insights/', views.summary_insights, name='summary_insights'), # Expansion and keywords in one request
+    path('metrics', views.metrics_view, name='metrics'), # Prometheus scrape endpoint
 ]
\ No newline at end of file
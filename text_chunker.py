@@ -0,0 +1,157 @@
+from functools import lru_cache
+
+# Used when no tokenizer is available: the old "about 3 characters per token" estimate.
+FALLBACK_CHARS_PER_TOKEN = 3
+FALLBACK_MAX_TOKENS = 1024
+
+# Some tokenizers report a huge sentinel instead of a real limit.
+UNBOUNDED_MODEL_MAX_LENGTH = 1_000_000
+
+# NLTK sentence tokenizer data: 'punkt' for older NLTK releases, 'punkt_tab' for 3.9 and later.
+PUNKT_RESOURCES = ('punkt', 'punkt_tab')
+
+_punkt_checked = False
+
+
+def ensure_punkt() -> None:
+    """
+    Downloads NLTK's sentence tokenizer data (used by sent_tokenize) if it is missing.
+    Checked once per process.
+    """
+    global _punkt_checked
+    if _punkt_checked:
+        return
+    import nltk
+    for resource in PUNKT_RESOURCES:
+        try:
+            nltk.data.find(f'tokenizers/{resource}')
+        except LookupError:
+            nltk.download(resource, quiet=True)
+    _punkt_checked = True
+
+
+class TokenChunker:
+    """
+    Packs sentences into chunks that fit a model's input limit, measured with the
+    model's own tokenizer. Token counts are cached per sentence, so headers, footers and
+    other repeated sentences are only tokenized once.
+    """
+
+    def __init__(self, tokenizer=None, max_tokens: int = None, cache_size: int = 65536):
+        """
+        Args:
+            tokenizer: A HuggingFace tokenizer (e.g. pipeline.tokenizer). If None, token counts
+                       are estimated from the character count.
+            max_tokens (int, optional): Input limit in tokens. Defaults to the tokenizer's
+                                        model_max_length.
+            cache_size (int): Number of sentence token counts to keep cached.
+        """
+        self.tokenizer = tokenizer
+        model_max_length = getattr(tokenizer, 'model_max_length', None) or FALLBACK_MAX_TOKENS
+        if model_max_length >= UNBOUNDED_MODEL_MAX_LENGTH:
+            model_max_length = FALLBACK_MAX_TOKENS
+        self.model_max_length = max_tokens or model_max_length
+
+        # Leave room for the special tokens (<s>, </s>, ...) the tokenizer adds around each input.
+        special_tokens = tokenizer.num_special_tokens_to_add() if tokenizer is not None else 0
+        self.max_tokens = self.model_max_length - special_tokens
+
+        self.count_tokens = lru_cache(maxsize=cache_size)(self._count_tokens)
+
+    def _count_tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(text) // FALLBACK_CHARS_PER_TOKEN + 1
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def fits(self, text: str) -> bool:
+        """
+        Returns True if text fits the model's input limit as a single chunk.
+        """
+        return self.count_tokens(text) <= self.max_tokens
+
+    def chunk(self, sentences: list) -> list:
+        """
+        Greedily packs consecutive sentences into chunks of at most max_tokens tokens.
+        A sentence longer than the limit is split on word boundaries so no text is lost.
+
+        Args:
+            sentences (list): The sentences to pack, in document order.
+
+        Returns:
+            list: The chunk texts, in document order.
+        """
+        return list(self.iter_chunks(sentences))
+
+    def iter_chunks(self, sentences):
+        """
+        Like chunk(), but consumes any iterable of sentences and yields each chunk as soon as
+        it is full, so chunks can be processed while later sentences are still being produced.
+        """
+        current_chunk = []
+        current_tokens = 0
+
+        for sentence in sentences:
+            # One extra token per sentence covers the joining space.
+            sentence_tokens = self.count_tokens(sentence) + 1
+            if sentence_tokens > self.max_tokens:
+                pieces = self._split_long_sentence(sentence)
+                if not pieces:
+                    continue # Only whitespace
+                if current_chunk:
+                    yield " ".join(current_chunk)
+                yield from pieces[:-1]
+                # The tail of the split sentence can still share a chunk with what follows.
+                current_chunk = [pieces[-1]]
+                current_tokens = self.count_tokens(pieces[-1]) + 1
+                continue
+
+            if current_tokens + sentence_tokens > self.max_tokens and current_chunk:
+                yield " ".join(current_chunk)
+                current_chunk, current_tokens = [], 0
+            current_chunk.append(sentence)
+            current_tokens += sentence_tokens
+
+        if current_chunk:
+            yield " ".join(current_chunk)
+
+    def _split_long_sentence(self, sentence: str) -> list:
+        pieces = []
+        current_words = []
+        current_tokens = 0
+        for word in sentence.split():
+            word_tokens = self.count_tokens(word) + 1
+            if word_tokens > self.max_tokens:
+                # A run of text with no spaces (a URL, a table flattened by extraction) longer than the limit.
+                if current_words:
+                    pieces.append(" ".join(current_words))
+                    current_words, current_tokens = [], 0
+                *head, word = self._split_long_word(word)
+                pieces.extend(head)
+                word_tokens = self.count_tokens(word) + 1
+            if current_tokens + word_tokens > self.max_tokens and current_words:
+                pieces.append(" ".join(current_words))
+                current_words, current_tokens = [], 0
+            current_words.append(word)
+            current_tokens += word_tokens
+        if current_words:
+            pieces.append(" ".join(current_words))
+        return pieces
+
+    def _split_long_word(self, word: str) -> list:
+        """
+        Hard-splits a word longer than the limit into pieces that each fit, taking the longest
+        prefix that fits each time (found by bisection).
+        """
+        pieces = []
+        while len(word) > 1 and self._count_tokens(word) + 1 > self.max_tokens:
+            low, high = 1, len(word) - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self._count_tokens(word[:middle]) + 1 <= self.max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            pieces.append(word[:low])
+            word = word[low:]
+        pieces.append(word)
+        return pieces
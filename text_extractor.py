@@ -1,8 +1,29 @@
 import PyPDF2
+import atexit
+import ctypes
+import functools
+import importlib.util
+import io
+import logging
+import mmap
 import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
 import pytesseract
-from pdf2image import convert_from_path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from contextlib import contextmanager
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image # Pillow is imported via PIL
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
 
 # --- IMPORTANT CONFIGURATION ---
 # 1. If Tesseract is NOT in your system's PATH, uncomment and set the correct path:
@@ -12,18 +33,189 @@ from PIL import Image # Pillow is imported via PIL
 # poppler_path = r'C:\Program Files\poppler-24.02.0\Library\bin' # Adjust version and path as per your extraction
 # (Note: pdf2image's convert_from_path takes 'poppler_path' argument, which we'll use below)
 
+# Bump whenever extraction output changes, so cached results from older versions are not reused.
+EXTRACTOR_VERSION = "3"
+
+# Scanned PDFs are rasterized this many pages at a time, so peak memory does not grow with page count.
+RASTER_WINDOW_PAGES = 4
+
+# Pages whose native text layer is shorter than this are treated as scanned and OCR'd.
+MIN_NATIVE_PAGE_CHARS = 50
+
+# Adaptive OCR: every page is first rendered at OCR_FAST_DPI. Pages whose mean Tesseract word
+# confidence (0-100) comes out below OCR_MIN_CONFIDENCE are rendered again at OCR_FINE_DPI,
+# so clean scans cost a quarter of the pixels and only hard pages pay for full resolution.
+OCR_FAST_DPI = 150
+OCR_FINE_DPI = 300
+OCR_MIN_CONFIDENCE = 70
+
+# --- PDF sources ---
+# Every extraction function accepts either a file path or the document itself: bytes,
+# bytearray, memoryview, an mmap, or a binary file-like object (e.g. a Django upload).
+# In-memory sources are parsed without touching the disk; only tools that need a file path
+# (poppler for OCR, pdftotext, parallel extraction workers) get a temporary copy.
+
+
+def _is_path(pdf_source) -> bool:
+    return isinstance(pdf_source, (str, os.PathLike))
 
-def extract_text_from_native_pdf(pdf_path: str) -> str:
+
+def _source_name(pdf_source) -> str:
     """
-    Extracts text from a native (text-based) PDF document efficiently.
-    Handles encrypted or corrupted PDFs gracefully.
+    Returns a short name for a PDF source, for messages.
     """
-    if not os.path.exists(pdf_path):
-        return ""
+    if _is_path(pdf_source):
+        return os.path.basename(pdf_source)
+    name = getattr(pdf_source, 'name', None)
+    return os.path.basename(name) if isinstance(name, str) else "<in-memory PDF>"
+
+
+def _source_exists(pdf_source) -> bool:
+    return os.path.exists(pdf_source) if _is_path(pdf_source) else pdf_source is not None
+
 
+@contextmanager
+def _open_pdf_stream(pdf_source):
+    """
+    Opens a PDF source as a seekable binary stream for PyPDF2, without copying in-memory data.
+    """
+    if _is_path(pdf_source):
+        with open(pdf_source, 'rb') as file:
+            yield file
+    elif isinstance(pdf_source, mmap.mmap):
+        pdf_source.seek(0)
+        yield pdf_source # mmap objects are file-like themselves
+    elif isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(pdf_source) # Shares the buffer of a bytes object rather than copying it
+    else:
+        pdf_source.seek(0)
+        yield pdf_source
+
+
+def read_pdf_bytes(pdf_source) -> bytes:
+    """
+    Returns the raw bytes of a PDF source.
+    """
+    if _is_path(pdf_source):
+        with open(pdf_source, 'rb') as file:
+            return file.read()
+    if isinstance(pdf_source, bytes):
+        return pdf_source
+    if isinstance(pdf_source, (bytearray, memoryview, mmap.mmap)):
+        return bytes(pdf_source)
+    pdf_source.seek(0)
+    return pdf_source.read()
+
+
+@contextmanager
+def _source_file_path(pdf_source):
+    """
+    Yields a file path for a PDF source, for tools that need one (poppler, worker processes).
+    Paths are used as they are; an in-memory source is written once to a unique temporary
+    file, removed afterwards.
+    """
+    if _is_path(pdf_source):
+        yield pdf_source
+        return
+    fd, temp_path = tempfile.mkstemp(suffix='.pdf')
     try:
-        extracted_pages_text = []
-        with open(pdf_path, 'rb') as file:
+        with os.fdopen(fd, 'wb') as file:
+            if isinstance(pdf_source, (bytes, bytearray, memoryview, mmap.mmap)):
+                file.write(pdf_source)
+            else:
+                pdf_source.seek(0)
+                for block in iter(lambda: pdf_source.read(1024 * 1024), b''):
+                    file.write(block)
+        yield temp_path
+    finally:
+        os.remove(temp_path)
+
+
+# --- Native extraction backends ---
+# Each backend takes a PDF source and an optional page range (0-based, end exclusive) and
+# returns one string per page, raising on any problem.
+# The fast backends are used when installed; PyPDF2 (pure Python, always available) is the
+# fallback, and also the one that reports encrypted and corrupted files.
+
+# "auto" picks the first available of NATIVE_BACKEND_ORDER; or name a backend explicitly.
+NATIVE_BACKEND = os.environ.get("PDF_NATIVE_BACKEND", "auto")
+NATIVE_BACKEND_ORDER = ("pdfium", "pymupdf", "pdftotext", "pypdf2")
+
+_pdfium_lock = threading.Lock() # pdfium itself is not thread-safe
+
+# Parallel native extraction (see extract_native_pages): documents with at least
+# PARALLEL_NATIVE_MIN_PAGES pages are split into page ranges of at least
+# NATIVE_RANGE_MIN_PAGES pages, extracted by NATIVE_WORKERS processes.
+NATIVE_WORKERS = int(os.environ.get("PDF_NATIVE_WORKERS", "1"))
+PARALLEL_NATIVE_MIN_PAGES = 64
+NATIVE_RANGE_MIN_PAGES = 16
+
+
+def _pdfium_pages(pdf_path, first_page: int = 0, last_page: int = None) -> list:
+    import pypdfium2
+
+    if isinstance(pdf_path, (bytearray, memoryview, mmap.mmap)):
+        try:
+            # pdfium reads writable buffers in place; read-only ones have to be copied.
+            pdf_path = (ctypes.c_char * len(pdf_path)).from_buffer(pdf_path)
+        except TypeError:
+            pdf_path = bytes(pdf_path)
+    elif not _is_path(pdf_path) and not isinstance(pdf_path, bytes):
+        pdf_path.seek(0)
+    with _pdfium_lock:
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            pages_text = []
+            for page_index in range(first_page, len(document) if last_page is None else last_page):
+                page = document[page_index]
+                text_page = page.get_textpage()
+                pages_text.append(text_page.get_text_range().replace("\r\n", "\n"))
+                text_page.close()
+                page.close()
+            return pages_text
+        finally:
+            document.close()
+
+
+def _pymupdf_document(pdf_path):
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf # Name used by PyMuPDF before 1.24
+
+    if _is_path(pdf_path):
+        return pymupdf.open(pdf_path)
+    if isinstance(pdf_path, (bytes, bytearray, memoryview, mmap.mmap)):
+        return pymupdf.open(stream=memoryview(pdf_path), filetype="pdf")
+    return pymupdf.open(stream=read_pdf_bytes(pdf_path), filetype="pdf")
+
+
+def _pymupdf_pages(pdf_path, first_page: int = 0, last_page: int = None) -> list:
+    with _pymupdf_document(pdf_path) as document:
+        if document.needs_pass:
+            raise ValueError("PDF is encrypted")
+        last_page = document.page_count if last_page is None else last_page
+        return [document[page_index].get_text() for page_index in range(first_page, last_page)]
+
+
+def _pdftotext_pages(pdf_path, first_page: int = 0, last_page: int = None) -> list:
+    page_range = ["-f", str(first_page + 1)] + (["-l", str(last_page)] if last_page is not None else [])
+    with _source_file_path(pdf_path) as file_path:
+        result = subprocess.run(["pdftotext", "-enc", "UTF-8"] + page_range + [file_path, "-"],
+                                capture_output=True, check=True)
+    # pdftotext ends every page with a form feed.
+    pages_text = result.stdout.decode('utf-8', errors='replace').split("\f")
+    return pages_text[:-1] if pages_text and pages_text[-1] == "" else pages_text
+
+
+def _pypdf2_pages(pdf_path, first_page: int = 0, last_page: int = None):
+    """
+    The PyPDF2 backend. Unlike the others it never raises: unreadable files are reported
+    with the "ENCRYPTED_PDF" / "CORRUPTED_PDF" sentinels, other failures with an empty list.
+    """
+    try:
+        pages_text = []
+        with _open_pdf_stream(pdf_path) as file:
             reader = PyPDF2.PdfReader(file)
 
             if reader.is_encrypted:
@@ -31,105 +223,707 @@ def extract_text_from_native_pdf(pdf_path: str) -> str:
                 # For real-world, you might prompt for a password or indicate a need for one.
                 try:
                     reader.decrypt('') 
-                    print(f"Warning: PDF '{os.path.basename(pdf_path)}' was encrypted but successfully decrypted with no password.")
+                    logger.warning(f"PDF '{_source_name(pdf_path)}' was encrypted but successfully decrypted with no password.")
                 except PyPDF2.errors.FileNotDecryptedError:
-                    print(f"Error: PDF '{os.path.basename(pdf_path)}' is encrypted and requires a password. Cannot extract text.")
+                    logger.error(f"PDF '{_source_name(pdf_path)}' is encrypted and requires a password. Cannot extract text.")
                     return "ENCRYPTED_PDF" # Special sentinel value for encrypted PDFs
 
-            for page_num in range(len(reader.pages)):
+            for page_num in range(first_page, len(reader.pages) if last_page is None else last_page):
                 page = reader.pages[page_num]
-                text = page.extract_text()
-                if text:
-                    extracted_pages_text.append(text)
+                pages_text.append(page.extract_text() or "")
         
-        return "\n".join(extracted_pages_text)
+        return pages_text
 
     except PyPDF2.errors.PdfReadError:
-        print(f"Error: PDF '{os.path.basename(pdf_path)}' appears to be corrupted or malformed. Cannot extract text.")
+        logger.error(f"PDF '{_source_name(pdf_path)}' appears to be corrupted or malformed. Cannot extract text.")
         return "CORRUPTED_PDF" # Special sentinel value for corrupted PDFs
     except Exception as e:
-        print(f"An unexpected error occurred during native PDF processing of {pdf_path}: {e}")
-        return ""
+        logger.error(f"An unexpected error occurred during native PDF processing of {_source_name(pdf_path)}: {e}")
+        return []
+
+
+def _backend_available(name: str) -> bool:
+    if name == "pdftotext":
+        return shutil.which("pdftotext") is not None
+    if name == "pypdf2":
+        return True
+    module_names = {"pdfium": ("pypdfium2",), "pymupdf": ("pymupdf", "fitz")}[name]
+    return any(importlib.util.find_spec(module_name) for module_name in module_names)
+
+
+_NATIVE_BACKENDS = {
+    "pdfium": _pdfium_pages,
+    "pymupdf": _pymupdf_pages,
+    "pdftotext": _pdftotext_pages,
+    "pypdf2": _pypdf2_pages,
+}
+
+
+def _native_page_count(pdf_path, backend: str) -> int:
+    """
+    Counts the pages of a PDF with the cheapest available reader.
+    """
+    if backend == "pdfium":
+        import pypdfium2
+        with _pdfium_lock:
+            document = pypdfium2.PdfDocument(pdf_path if _is_path(pdf_path) else read_pdf_bytes(pdf_path))
+            try:
+                return len(document)
+            finally:
+                document.close()
+    if backend == "pymupdf":
+        with _pymupdf_document(pdf_path) as document:
+            return document.page_count
+    with _open_pdf_stream(pdf_path) as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def _extract_page_range(file_path: str, backend: str, first_page: int, last_page: int):
+    """
+    Extracts pages [first_page, last_page) of a PDF file. Runs inside a worker process,
+    which maps the file into memory rather than reading a private copy of it.
+    """
+    if backend == "pdftotext":
+        return _pdftotext_pages(file_path, first_page, last_page)
+    with open(file_path, 'rb') as file:
+        # A copy-on-write mapping is writable, so pdfium can parse it in place.
+        pdf_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    try:
+        return _NATIVE_BACKENDS[backend](pdf_map, first_page, last_page)
+    finally:
+        try:
+            pdf_map.close()
+        except BufferError:
+            pass # Still referenced by the backend; released with it
+
+
+def _extract_pages_parallel(pdf_path, backend: str, workers: int):
+    """
+    Extracts a large PDF by splitting it into page ranges extracted in a process pool.
+
+    Returns:
+        list | None: One string per page, in page order. None if the document is too small
+                     to be worth splitting or any range failed (the caller then extracts
+                     it sequentially, which also reports encrypted and corrupted files).
+    """
+    try:
+        page_count = _native_page_count(pdf_path, backend)
+    except Exception:
+        return None
+    if page_count < PARALLEL_NATIVE_MIN_PAGES:
+        return None
+
+    # A few ranges per worker keep all workers busy when some pages are much denser than others.
+    range_size = max(NATIVE_RANGE_MIN_PAGES, -(-page_count // (workers * 4)))
+    ranges = [(first_page, min(first_page + range_size, page_count))
+              for first_page in range(0, page_count, range_size)]
+
+    pages_text = []
+    try:
+        with _source_file_path(pdf_path) as file_path, \
+                ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [executor.submit(_extract_page_range, file_path, backend, first_page, last_page)
+                       for first_page, last_page in ranges]
+            for (first_page, last_page), future in zip(ranges, futures):
+                range_text = future.result()
+                if not isinstance(range_text, list) or len(range_text) != last_page - first_page:
+                    executor.shutdown(cancel_futures=True)
+                    return None
+                pages_text.extend(range_text)
+    except Exception as e:
+        logger.warning(f"Parallel extraction of {_source_name(pdf_path)} failed ({e}). Extracting sequentially.")
+        return None
+    return pages_text
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_native_backend(backend: str = None) -> str:
+    """
+    Returns the name of the native extraction backend that will be used for `backend`
+    ("auto", a backend name, or None for NATIVE_BACKEND). Unavailable backends resolve to "pypdf2".
+    """
+    backend = backend or NATIVE_BACKEND
+    if backend == "auto":
+        return next(name for name in NATIVE_BACKEND_ORDER if _backend_available(name))
+    if backend not in _NATIVE_BACKENDS:
+        raise ValueError(f"Unknown native extraction backend '{backend}'. Choose from: auto, {', '.join(NATIVE_BACKEND_ORDER)}.")
+    if not _backend_available(backend):
+        logger.warning(f"Native extraction backend '{backend}' is not installed. Falling back to PyPDF2.")
+        return "pypdf2"
+    return backend
+
+
+def extract_native_pages(pdf_path, backend: str = None, workers: int = None):
+    """
+    Extracts the native text layer of every page of a PDF.
+    Handles encrypted or corrupted PDFs gracefully.
+
+    Args:
+        pdf_path (str | bytes | file-like): The PDF file path, or its contents (see "PDF sources").
+        backend (str, optional): The extraction backend ("auto", "pdfium", "pymupdf", "pdftotext"
+                                 or "pypdf2"). Defaults to NATIVE_BACKEND.
+        workers (int, optional): Number of processes used to extract large documents in page
+                                 ranges. Defaults to NATIVE_WORKERS; 1 extracts in-process.
+
+    Returns:
+        list | str: One string per page, in page order ("" for pages without a text layer).
+                    Returns the "ENCRYPTED_PDF" or "CORRUPTED_PDF" sentinel for unreadable files,
+                    and an empty list if the file is missing or an unexpected error occurs.
+    """
+    if not _source_exists(pdf_path):
+        return []
+
+    backend = resolve_native_backend(backend)
+    workers = NATIVE_WORKERS if workers is None else workers
+    if workers > 1:
+        pages_text = _extract_pages_parallel(pdf_path, backend, workers)
+        if pages_text is not None:
+            return pages_text
+
+    if backend != "pypdf2":
+        try:
+            return _NATIVE_BACKENDS[backend](pdf_path)
+        except Exception as e:
+            # Encrypted, damaged or unusual files: let PyPDF2 decide (and report) what is wrong.
+            logger.warning(f"The {backend} backend could not read {_source_name(pdf_path)} ({e}). Falling back to PyPDF2.")
+    return _pypdf2_pages(pdf_path)
+
+
+def extract_text_from_native_pdf(pdf_path, backend: str = None, workers: int = None) -> str:
+    """
+    Extracts text from a native (text-based) PDF document efficiently.
+    Handles encrypted or corrupted PDFs gracefully.
+    """
+    pages_text = extract_native_pages(pdf_path, backend=backend, workers=workers)
+    if isinstance(pages_text, str):
+        return pages_text # "ENCRYPTED_PDF" / "CORRUPTED_PDF"
+    return "\n".join(text for text in pages_text if text)
+
+
+def _binarize(pixels):
+    """
+    Converts a grayscale page (a 2-D uint8 array) to black and white using Otsu's threshold
+    (the gray level that best separates ink from paper), computed over its histogram with NumPy.
+    """
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    sum_dark = np.cumsum(histogram * np.arange(256))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_dark = sum_dark / weight_dark
+        mean_light = (sum_dark[-1] - sum_dark) / weight_light
+        between_class_variance = np.nan_to_num(weight_dark * weight_light * (mean_dark - mean_light) ** 2)
+    threshold = int(np.argmax(between_class_variance))
+    return np.where(pixels > threshold, 255, 0).astype(np.uint8)
+
+
+def _ocr_data_to_text(data: dict) -> tuple:
+    """
+    Rebuilds page text from Tesseract's word-level output (image_to_data).
+
+    Returns:
+        tuple: (text, confidence), confidence being the mean word confidence (0-100),
+               or 0 if no words were recognized.
+    """
+    lines = []
+    confidences = []
+    previous_line = previous_block = None
+    for i, word in enumerate(data['text']):
+        confidence = float(data['conf'][i])
+        if confidence < 0 or not word.strip():
+            continue
+        block = data['block_num'][i]
+        line = (block, data['par_num'][i], data['line_num'][i])
+        if line != previous_line:
+            if previous_block is not None and block != previous_block:
+                lines.append("") # Blank line between text blocks
+            lines.append(word)
+        else:
+            lines[-1] += " " + word
+        previous_line, previous_block = line, block
+        confidences.append(confidence)
+    return "\n".join(lines), (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+# --- OCR engine ---
+# When tesserocr (bindings to Tesseract's C API, see requirements.txt) is installed, each OCR
+# process loads the language data once and keeps the engine for every later page. Without it
+# (e.g. on Windows, where it has no wheels) pytesseract is the fallback: it starts a tesseract
+# process for every page, which reloads the language data and round-trips the page through a
+# temporary image file, typically adding a few hundred milliseconds per page. A warning is
+# logged once per process when OCR falls back. OCR processes live in a pool shared by all
+# documents, and rendered pages reach them through shared memory instead of being pickled.
+
+OCR_LANGUAGE = "eng"
+
+_tess_api = None # This process's tesserocr engine; False if tesserocr is unavailable
+_tess_lock = threading.Lock() # One engine recognizes one page at a time
+
+
+def _get_tess_api():
+    """
+    Returns this process's tesserocr engine, creating it on first use, or None without tesserocr.
+    """
+    global _tess_api
+    if _tess_api is None:
+        try:
+            import tesserocr
+            _tess_api = tesserocr.PyTessBaseAPI(lang=OCR_LANGUAGE)
+        except ImportError:
+            logger.warning("tesserocr is not installed, so OCR starts a tesseract process for every page. "
+                           "Install tesserocr (see requirements.txt) for faster OCR.")
+            _tess_api = False
+        except Exception as e:
+            logger.warning(f"Could not start tesserocr ({e}). Falling back to pytesseract, "
+                           f"which starts a tesseract process for every page.")
+            _tess_api = False
+    return _tess_api or None
 
 
-def extract_text_from_scanned_pdf(pdf_path: str, poppler_path: str = None) -> str:
+def _recognize(binary) -> tuple:
+    """
+    OCRs a binarized page (a 2-D uint8 array).
+
+    Returns:
+        tuple: (text, confidence), confidence being the mean word confidence (0-100).
+    """
+    api = _get_tess_api()
+    if api is None:
+        data = pytesseract.image_to_data(Image.fromarray(binary), lang=OCR_LANGUAGE,
+                                         output_type=pytesseract.Output.DICT)
+        return _ocr_data_to_text(data)
+
+    height, width = binary.shape
+    with _tess_lock:
+        api.SetImageBytes(binary.tobytes(), width, height, 1, width)
+        text = api.GetUTF8Text()
+        confidences = api.AllWordConfidences()
+    return text.strip(), (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+def _ocr_page(page_index: int, pixels, tesseract_cmd: str = None) -> tuple:
+    """
+    Binarizes and OCRs a single grayscale page (a 2-D uint8 array).
+
+    Returns:
+        tuple: (page_index, text, confidence, error). error is None on success, "TESSERACT_NOT_FOUND"
+               if Tesseract could not be started, or the error message otherwise.
+    """
+    if tesseract_cmd:
+        # Worker processes do not inherit a tesseract_cmd set at runtime on spawn-based platforms.
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    try:
+        text, confidence = _recognize(_binarize(pixels))
+        return page_index, text, confidence, None
+    except pytesseract.TesseractNotFoundError:
+        return page_index, "", 0.0, "TESSERACT_NOT_FOUND"
+    except Exception as e:
+        return page_index, "", 0.0, str(e)
+
+
+def _ocr_shared_page(page_index: int, memory_name: str, shape: tuple, tesseract_cmd: str = None) -> tuple:
+    """
+    OCRs a grayscale page that the parent process placed in shared memory. Runs inside an
+    OCR worker process; the parent frees the memory once the result is back.
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        return _ocr_page(page_index, np.ndarray(shape, dtype=np.uint8, buffer=memory.buf), tesseract_cmd)
+    finally:
+        memory.close()
+
+
+def _init_ocr_worker(tesseract_cmd: str = None):
+    global _tess_api, _tess_lock
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    # An engine (or lock) copied from a forked parent is not safe to use; start a fresh one,
+    # loading the language data now, before the first page arrives.
+    _tess_api, _tess_lock = None, threading.Lock()
+    _get_tess_api()
+
+
+_ocr_pool = None
+_ocr_pool_config = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _get_ocr_pool(ocr_workers: int, tesseract_cmd: str = None) -> ProcessPoolExecutor:
+    """
+    Returns the process-wide OCR pool, starting it (or restarting it with a new configuration)
+    as needed. The pool outlives individual documents, so its processes keep their engines.
+    """
+    global _ocr_pool, _ocr_pool_config
+    with _ocr_pool_lock:
+        if _ocr_pool is None or _ocr_pool_config != (ocr_workers, tesseract_cmd):
+            if _ocr_pool is not None:
+                _ocr_pool.shutdown(wait=False)
+            _ocr_pool = ProcessPoolExecutor(max_workers=ocr_workers, initializer=_init_ocr_worker,
+                                            initargs=(tesseract_cmd,))
+            _ocr_pool_config = (ocr_workers, tesseract_cmd)
+        return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    """
+    Stops the OCR worker processes. Called automatically at interpreter exit.
+    """
+    global _ocr_pool, _ocr_pool_config
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown()
+        _ocr_pool = _ocr_pool_config = None
+
+
+atexit.register(shutdown_ocr_pool)
+
+
+def _get_page_count(pdf_path, poppler_path: str = None) -> int:
+    """
+    Returns the number of pages in a PDF (path or in-memory source) using poppler's pdfinfo.
+    """
+    with _source_file_path(pdf_path) as raster_path:
+        info = pdfinfo_from_path(raster_path, poppler_path=poppler_path)
+    return int(info["Pages"])
+
+
+def _page_windows(page_indices: list, window: int) -> list:
+    """
+    Groups sorted 0-based page indices into runs of consecutive pages, each at most `window` long.
+    """
+    windows = []
+    for page_index in sorted(page_indices):
+        if windows and page_index == windows[-1][-1] + 1 and len(windows[-1]) < window:
+            windows[-1].append(page_index)
+        else:
+            windows.append([page_index])
+    return windows
+
+
+def _iter_page_images(pdf_path: str, page_indices: list, dpi: int = 300, poppler_path: str = None,
+                      window: int = RASTER_WINDOW_PAGES):
+    """
+    Rasterizes the given pages (0-based) in windows of up to `window` consecutive pages
+    and yields (page_index, image) pairs.
+
+    Only one window of rendered pages is held at a time; each image is handed over and
+    dropped before the next one is yielded, so memory stays flat however long the document is.
+    """
+    for run in _page_windows(page_indices, max(1, window)):
+        # Pages are rendered in grayscale: a third of the bytes of RGB, and all OCR needs.
+        with metrics.timer('rasterize_seconds', dpi=dpi):
+            images = convert_from_path(pdf_path, dpi=dpi, poppler_path=poppler_path, grayscale=True,
+                                       first_page=run[0] + 1, last_page=run[-1] + 1)
+        for page_index in run:
+            if not images:
+                break
+            yield page_index, images.pop(0)
+
+
+def _iter_ocr_results(page_images, ocr_workers: int = 1):
+    """
+    OCRs (page_index, image) pairs, spreading the pages over the OCR worker pool,
+    and yields (page_index, text, confidence, error) tuples as soon as each page is done.
+
+    Args:
+        page_images (iterable): (page_index, image) pairs, typically from _iter_page_images.
+        ocr_workers (int): Number of OCR processes. With 1 worker OCR runs in-process.
+
+    Yields:
+        tuple: (page_index, text, confidence, error), in completion order (not necessarily page order).
+    """
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+
+    if ocr_workers <= 1:
+        for i, image in page_images:
+            with metrics.timer('page_seconds', method='ocr'):
+                result = _ocr_page(i, np.asarray(image.convert("L")), tesseract_cmd)
+            yield result
+        return
+
+    executor = _get_ocr_pool(ocr_workers, tesseract_cmd)
+    pending = {} # future -> (page_index, shared memory holding the page, submission time)
+    # Keep a bounded number of pages in flight so rendered images are not queued up in memory.
+    max_pending = ocr_workers * 2
+
+    def collect(done):
+        global _ocr_pool
+        for future in done:
+            page_index, memory, submitted = pending.pop(future)
+            memory.close()
+            memory.unlink()
+            # Measured from submission, so time spent queued behind other pages counts too.
+            metrics.record('page_seconds', submitted, time.perf_counter() - submitted, method='ocr')
+            try:
+                yield future.result()
+            except Exception as e:
+                # A crashed worker only loses its own page; the broken pool is replaced on next use.
+                if isinstance(e, BrokenProcessPool):
+                    with _ocr_pool_lock:
+                        if _ocr_pool is executor:
+                            _ocr_pool = None
+                yield page_index, "", 0.0, str(e)
+
+    try:
+        for page_index, image in page_images:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+            pixels = np.asarray(image.convert("L"))
+            del image
+            memory = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+            np.ndarray(pixels.shape, dtype=np.uint8, buffer=memory.buf)[:] = pixels
+            submitted = time.perf_counter()
+            try:
+                future = executor.submit(_ocr_shared_page, page_index, memory.name, pixels.shape, tesseract_cmd)
+            except Exception:
+                memory.close()
+                memory.unlink()
+                raise
+            pending[future] = (page_index, memory, submitted)
+            del pixels
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+    finally:
+        # Abandoned early (an error, or the consumer stopped): wait for the pages still in
+        # flight so their shared memory can be freed safely.
+        if pending:
+            wait(pending)
+            for page_index, memory, _ in pending.values():
+                memory.close()
+                memory.unlink()
+
+
+def _iter_ocr_pass(raster_path: str, pdf_name: str, page_indices: list, dpi: int,
+                   poppler_path: str = None, workers: int = 1):
+    """
+    Renders the given pages at `dpi` and OCRs them, yielding (page_index, text, confidence)
+    as soon as each page is done. Pages whose OCR failed are reported and skipped.
+    """
+    page_images = _iter_page_images(raster_path, page_indices, dpi=dpi, poppler_path=poppler_path,
+                                    window=max(RASTER_WINDOW_PAGES, workers))
+    for i, text, confidence, error in _iter_ocr_results(page_images, ocr_workers=workers):
+        if error == "TESSERACT_NOT_FOUND":
+            raise pytesseract.TesseractNotFoundError()
+        if error:
+            logger.warning(f"OCR failed on page {i+1} of {pdf_name}: {error}")
+        else:
+            yield i, text, confidence
+
+
+def _iter_ocr_pdf_pages(pdf_path, page_indices: list, poppler_path: str = None,
+                        ocr_workers: int = None):
+    """
+    Rasterizes and OCRs the given pages (0-based) of a PDF, yielding (page_index, text, confidence)
+    as soon as each page is done. Pages whose OCR failed are reported and skipped.
+    An in-memory source is written to a temporary file once, only if any page needs OCR.
+
+    OCR is adaptive: pages are read at OCR_FAST_DPI first, and those read with a mean word
+    confidence below OCR_MIN_CONFIDENCE are read again at OCR_FINE_DPI. Whichever reading
+    is more confident is kept.
+
+    Raises:
+        pytesseract.TesseractNotFoundError: If Tesseract cannot be started.
+    """
+    if not page_indices:
+        return
+
+    pdf_name = _source_name(pdf_path)
+    # The pool is sized by ocr_workers alone (not by page count) so that it can be reused.
+    workers = max(1, ocr_workers or os.cpu_count() or 1)
+
+    def finished(i, text, confidence):
+        if not text:
+            logger.warning(f"No text found on page {i+1} using OCR for {pdf_name}.")
+        return i, text, confidence
+
+    with _source_file_path(pdf_path) as raster_path:
+        low_confidence = {}
+        for i, text, confidence in _iter_ocr_pass(raster_path, pdf_name, page_indices, OCR_FAST_DPI,
+                                                  poppler_path=poppler_path, workers=workers):
+            if confidence >= OCR_MIN_CONFIDENCE or OCR_FINE_DPI <= OCR_FAST_DPI:
+                yield finished(i, text, confidence)
+            else:
+                low_confidence[i] = (text, confidence)
+
+        if low_confidence:
+            logger.info(f"Re-reading {len(low_confidence)} low-confidence pages of {pdf_name} at {OCR_FINE_DPI} DPI...")
+            for i, text, confidence in _iter_ocr_pass(raster_path, pdf_name, sorted(low_confidence), OCR_FINE_DPI,
+                                                      poppler_path=poppler_path, workers=workers):
+                fast_text, fast_confidence = low_confidence.pop(i)
+                if confidence < fast_confidence:
+                    text, confidence = fast_text, fast_confidence
+                yield finished(i, text, confidence)
+        # Pages whose second reading failed keep the first one.
+        for i, (text, confidence) in low_confidence.items():
+            yield finished(i, text, confidence)
+
+
+def _ocr_pdf_pages(pdf_path, page_indices: list, poppler_path: str = None,
+                   ocr_workers: int = None) -> dict:
+    """
+    Rasterizes and OCRs the given pages (0-based) of a PDF.
+
+    Returns:
+        dict: Maps page_index to (text, confidence). Pages whose OCR failed are reported and left out.
+
+    Raises:
+        pytesseract.TesseractNotFoundError: If Tesseract cannot be started.
+    """
+    return {i: (text, confidence) for i, text, confidence
+            in _iter_ocr_pdf_pages(pdf_path, page_indices, poppler_path=poppler_path, ocr_workers=ocr_workers)}
+
+
+def extract_text_from_scanned_pdf(pdf_path, poppler_path: str = None, ocr_workers: int = None,
+                                  ocr_confidence: dict = None) -> str:
     """
     Extracts text from a scanned (image-based) PDF document using OCR.
+    Pages are rasterized a few at a time and OCR'd in parallel across a pool of worker processes.
 
     Args:
-        pdf_path (str): The path to the scanned PDF file.
+        pdf_path (str | bytes | file-like): The scanned PDF file path, or its contents.
         poppler_path (str, optional): Path to Poppler's 'bin' directory if not in system PATH.
+        ocr_workers (int, optional): Number of OCR worker processes. Defaults to the number of CPUs.
+        ocr_confidence (dict, optional): Filled with {page_index: mean Tesseract word confidence (0-100)}.
 
     Returns:
-        str: The OCR-extracted text from the PDF.
+        str: The OCR-extracted text from the PDF, in page order.
              Returns an empty string if the file cannot be processed or OCR fails.
     """
-    if not os.path.exists(pdf_path):
+    if not _source_exists(pdf_path):
         return ""
 
-    full_text = []
     try:
-        # Convert PDF pages to images.
         # Pass poppler_path if it's not in the system's PATH.
-        images = convert_from_path(pdf_path, dpi=300, poppler_path=poppler_path)
-
-        for i, image in enumerate(images):
-            # Perform OCR on each image
-            text = pytesseract.image_to_string(image)
-            if text:
-                full_text.append(text)
-            else:
-                print(f"Warning: No text found on page {i+1} using OCR for {os.path.basename(pdf_path)}.")
-                
+        page_count = _get_page_count(pdf_path, poppler_path=poppler_path)
+        pages_text = _ocr_pdf_pages(pdf_path, list(range(page_count)), poppler_path=poppler_path,
+                                    ocr_workers=ocr_workers)
     except pytesseract.TesseractNotFoundError:
-        print("Error: Tesseract is not installed or not in your system PATH.")
-        print("Please install Tesseract and ensure it's accessible or configure pytesseract.pytesseract.tesseract_cmd.")
+        logger.error("Tesseract is not installed or not in your system PATH.")
+        logger.error("Please install Tesseract and ensure it's accessible or configure pytesseract.pytesseract.tesseract_cmd.")
         return ""
     except Exception as e:
-        print(f"An error occurred during OCR processing of {os.path.basename(pdf_path)}: {e}")
+        logger.error(f"An error occurred during OCR processing of {_source_name(pdf_path)}: {e}")
         return ""
 
-    return "\n".join(full_text)
+    if ocr_confidence is not None:
+        ocr_confidence.update({i: confidence for i, (_, confidence) in pages_text.items()})
+    return "\n".join(pages_text[i][0] for i in sorted(pages_text) if pages_text[i][0])
 
 
-def extract_text_from_pdf(pdf_path: str, poppler_path: str = None) -> str:
+def iter_pdf_pages(pdf_path, poppler_path: str = None, ocr_workers: int = None, native_workers: int = None,
+                   ocr_confidence: dict = None):
     """
-    Attempts to extract text from a PDF, trying native extraction first,
-    then falling back to OCR if native extraction yields no or insufficient text.
-    Handles specific error codes from native extraction.
+    Extracts a PDF page by page and yields (page_index, text) pairs in page order, as soon
+    as each page and all pages before it are available. Pages with a usable native text
+    layer keep their native text; only text-poor pages are rasterized and OCR'd, so later
+    stages can start on the first pages while the rest are still being OCR'd.
 
     Args:
-        pdf_path (str): The path to the PDF file (can be native or scanned).
+        pdf_path (str | bytes | file-like): The PDF file path, or its contents (can be native,
+                                            scanned or a mix of both).
         poppler_path (str, optional): Path to Poppler's 'bin' directory if not in system PATH.
+        ocr_workers (int, optional): Number of OCR worker processes used for text-poor pages.
+        native_workers (int, optional): Number of processes extracting the text layer of large
+                                        documents in page ranges. Defaults to NATIVE_WORKERS.
+        ocr_confidence (dict, optional): Filled with {page_index: mean Tesseract word confidence (0-100)}
+                                         for every page that was OCR'd, as the pages are read.
 
-    Returns:
-        str: The extracted text from the PDF. Returns an empty string if extraction fails
-             or specific error types (encrypted/corrupted) are encountered.
+    Yields:
+        tuple: (page_index, text). Nothing is yielded for encrypted or corrupted PDFs.
     """
-    if not os.path.exists(pdf_path):
-        print(f"Error: PDF file not found at {pdf_path}")
-        return ""
+    if not _source_exists(pdf_path):
+        logger.error(f"PDF file not found at {pdf_path}")
+        return
 
-    print(f"Attempting native text extraction for {os.path.basename(pdf_path)}...")
-    native_text = extract_text_from_native_pdf(pdf_path)
+    logger.info(f"Attempting native text extraction for {_source_name(pdf_path)}...")
+    started = time.perf_counter()
+    with metrics.timer('native_extraction_seconds'):
+        native_pages = extract_native_pages(pdf_path, workers=native_workers)
 
     # Check for specific error messages from native extraction
-    if native_text == "ENCRYPTED_PDF":
-        return "" # Don't try OCR if it's explicitly encrypted
-    if native_text == "CORRUPTED_PDF":
-        return "" # Don't try OCR if it's explicitly corrupted
-
-    # A heuristic: if native text is too short, or empty, assume it's scanned or poorly structured
-    # You might refine this threshold later. For now, if empty, try OCR.
-    if not native_text or len(native_text.strip()) < 50: # Adjust threshold as needed for your data
-        print(f"Native extraction for {os.path.basename(pdf_path)} failed or was insufficient. Attempting OCR...")
-        scanned_text = extract_text_from_scanned_pdf(pdf_path, poppler_path=poppler_path)
-        if scanned_text:
-            print(f"Successfully extracted text from {os.path.basename(pdf_path)} using OCR.")
-            return scanned_text
-        else:
-            print(f"OCR also failed for {os.path.basename(pdf_path)}. Could not extract text.")
-            return ""
-    else:
-        print(f"Successfully extracted text from {os.path.basename(pdf_path)} using native method.")
-        return native_text
\ No newline at end of file
+    if native_pages in ("ENCRYPTED_PDF", "CORRUPTED_PDF"):
+        return # Don't try OCR if it's explicitly encrypted or corrupted
+    native_page_seconds = (time.perf_counter() - started) / max(1, len(native_pages))
+
+    if not native_pages:
+        # The native reader could not enumerate the pages at all; OCR the whole document.
+        logger.info(f"Native extraction for {_source_name(pdf_path)} failed. Attempting OCR...")
+        try:
+            native_pages = [""] * _get_page_count(pdf_path, poppler_path=poppler_path)
+        except Exception as e:
+            logger.error(f"An error occurred during OCR processing of {_source_name(pdf_path)}: {e}")
+            return
+
+    # A heuristic: a page with less native text than this is assumed to be scanned or poorly structured.
+    text_poor_pages = [i for i, text in enumerate(native_pages) if len(text.strip()) < MIN_NATIVE_PAGE_CHARS]
+    if text_poor_pages:
+        logger.info(f"{len(text_poor_pages)} of {len(native_pages)} pages in {_source_name(pdf_path)} "
+                    f"lack a usable text layer. Attempting OCR on those pages...")
+
+    # OCR results arrive in completion order; pages are released in page order.
+    awaiting_ocr = set(text_poor_pages)
+    ocr_pages = {}
+    next_page = 0
+
+    def release_ready_pages():
+        nonlocal next_page
+        while next_page < len(native_pages) and next_page not in awaiting_ocr:
+            text = native_pages[next_page]
+            ocr_text = ocr_pages.pop(next_page, "")
+            if len(ocr_text.strip()) > len(text.strip()):
+                text = ocr_text
+                metrics.inc('pages_total', method='ocr')
+            else:
+                metrics.inc('pages_total', method='native')
+                metrics.observe('page_seconds', native_page_seconds, method='native')
+            yield next_page, text
+            next_page += 1
+
+    yield from release_ready_pages()
+    try:
+        for i, ocr_text, confidence in _iter_ocr_pdf_pages(pdf_path, text_poor_pages, poppler_path=poppler_path,
+                                                           ocr_workers=ocr_workers):
+            ocr_pages[i] = ocr_text
+            if ocr_confidence is not None:
+                ocr_confidence[i] = confidence
+            awaiting_ocr.discard(i)
+            yield from release_ready_pages()
+    except pytesseract.TesseractNotFoundError:
+        logger.error("Tesseract is not installed or not in your system PATH. Keeping native text only.")
+    except Exception as e:
+        logger.error(f"An error occurred during OCR processing of {_source_name(pdf_path)}: {e}")
+
+    # Pages whose OCR failed keep whatever native text they had.
+    awaiting_ocr.clear()
+    yield from release_ready_pages()
+
+
+def extract_text_from_pdf(pdf_path, poppler_path: str = None, ocr_workers: int = None,
+                          native_workers: int = None) -> str:
+    """
+    Extracts text from a PDF page by page. Pages with a usable native text layer keep
+    their native text; only text-poor pages (scans, image-only appendices) are rasterized
+    and OCR'd. Handles specific error codes from native extraction.
+
+    Args:
+        pdf_path (str | bytes | file-like): The PDF file path, or its contents (can be native,
+                                            scanned or a mix of both).
+        poppler_path (str, optional): Path to Poppler's 'bin' directory if not in system PATH.
+        ocr_workers (int, optional): Number of OCR worker processes used for text-poor pages.
+        native_workers (int, optional): Number of processes extracting the text layer of large
+                                        documents in page ranges. Defaults to NATIVE_WORKERS.
+
+    Returns:
+        str: The extracted text from the PDF. Returns an empty string if extraction fails
+             or specific error types (encrypted/corrupted) are encountered.
+    """
+    pages_text = [text for _, text in iter_pdf_pages(pdf_path, poppler_path=poppler_path, ocr_workers=ocr_workers,
+                                                     native_workers=native_workers)]
+    extracted_text = "\n".join(text for text in pages_text if text.strip())
+    if extracted_text:
+        logger.info(f"Successfully extracted text from {_source_name(pdf_path)} ({len(pages_text)} pages).")
+    elif _source_exists(pdf_path):
+        logger.error(f"Could not extract text from {_source_name(pdf_path)}.")
+    return extracted_text
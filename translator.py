@@ -0,0 +1,136 @@
+import logging
+
+from nltk.tokenize import sent_tokenize
+
+import metrics
+from model_registry import get_pipeline
+from result_cache import TranslationCache, DEFAULT_TRANSLATION_CACHE_PATH
+from text_chunker import TokenChunker, ensure_punkt
+
+logger = logging.getLogger(__name__)
+
+# Make sure nltk punkt is downloaded for sent_tokenize
+ensure_punkt()
+
+# Language-pair models are named like Helsinki-NLP/opus-mt-fr-en.
+PAIR_MODEL_TEMPLATE = "Helsinki-NLP/opus-mt-{source_lang}-en"
+
+
+class DocumentTranslator:
+    def __init__(self, model_name: str = "Helsinki-NLP/opus-mt-mul-en", use_pair_models: bool = True,
+                 batch_size: int = 16, cache_path: str = DEFAULT_TRANSLATION_CACHE_PATH):
+        """
+        Sets up translation from multiple languages to English. Models are loaded lazily
+        from the shared model registry the first time a non-English document needs them.
+
+        Args:
+            model_name (str): The multilingual fallback model.
+            use_pair_models (bool): Prefer a dedicated source-to-English model (opus-mt-<lang>-en)
+                                    when the source language is known and such a model exists.
+            batch_size (int): How many sentences are translated per forward pass.
+            cache_path (str, optional): Path of the persistent sentence translation cache.
+                                        None disables the cache.
+        """
+        self.model_name = model_name
+        self.use_pair_models = use_pair_models
+        self.batch_size = batch_size
+        self.cache = TranslationCache(cache_path) if cache_path else None
+        self._chunkers = {}
+        self._unavailable_models = set()
+
+    def _load(self, model_name: str):
+        """
+        Returns the pipeline for model_name, or None if it cannot be loaded. Failures are
+        remembered so a missing pair model is only tried once.
+        """
+        if model_name in self._unavailable_models:
+            return None
+        try:
+            nlp_pipeline = get_pipeline("translation", model_name)
+        except Exception as e:
+            logger.error(f"Error loading translation model {model_name}: {e}")
+            self._unavailable_models.add(model_name)
+            return None
+        if model_name not in self._chunkers:
+            # Sentences are sized with the model's own tokenizer (512 tokens for the opus-mt models).
+            self._chunkers[model_name] = TokenChunker(nlp_pipeline.tokenizer)
+        return nlp_pipeline
+
+    @property
+    def translator(self):
+        """
+        The multilingual translation pipeline, loaded on first access. None if the model failed to load.
+        """
+        return self._load(self.model_name)
+
+    def _select_model(self, source_lang: str):
+        """
+        Picks the language-pair model for source_lang if one is available, else the multilingual model.
+
+        Returns:
+            tuple: (model_name, pipeline), with pipeline None if no model could be loaded.
+        """
+        if self.use_pair_models and source_lang and source_lang not in ("unknown", "en"):
+            pair_model = PAIR_MODEL_TEMPLATE.format(source_lang=source_lang)
+            nlp_pipeline = self._load(pair_model)
+            if nlp_pipeline is not None:
+                return pair_model, nlp_pipeline
+        return self.model_name, self._load(self.model_name)
+
+    def can_translate(self, source_lang: str) -> bool:
+        """
+        Returns True if a model for translating source_lang to English can be loaded.
+        """
+        return self._select_model(source_lang)[1] is not None
+
+    def translate_to_english(self, text: str, source_lang: str) -> str:
+        """
+        Translates text from a source language to English.
+
+        Each distinct sentence is translated once: repeats within the document are
+        deduplicated, sentences seen before (in any document) come from the persistent
+        cache, and the rest are translated in batches.
+        """
+        model_name, nlp_pipeline = self._select_model(source_lang)
+        if nlp_pipeline is None:
+            return text # Return original text if translator failed to load
+        chunker = self._chunkers[model_name]
+
+        # Sentences longer than the model's input limit are split into pieces first.
+        units = []
+        for sentence in sent_tokenize(text):
+            units.extend(chunker.chunk([sentence]))
+        unique_units = list(dict.fromkeys(units))
+
+        with metrics.timer('translation_seconds', source_lang=source_lang):
+            translations = self.cache.get_many(model_name, source_lang, unique_units) if self.cache else {}
+            missing = [unit for unit in unique_units if unit not in translations]
+            if missing:
+                logger.info(f"Translating {len(missing)} new sentences ({len(unique_units) - len(missing)} cached)...")
+                metrics.inc('translated_sentences_total', len(missing), source_lang=source_lang)
+                new_translations = self._translate_batches(nlp_pipeline, chunker, missing)
+                if self.cache and new_translations:
+                    self.cache.put_many(model_name, source_lang, new_translations)
+                translations.update(new_translations)
+
+        return " ".join(translations[unit] for unit in units if unit in translations).strip()
+
+    def _translate_batches(self, nlp_pipeline, chunker: TokenChunker, sentences: list) -> dict:
+        """
+        Translates sentences in length-sorted batches.
+
+        Returns:
+            dict: Maps each successfully translated sentence to its translation.
+        """
+        translations = {}
+        ordered = sorted(sentences, key=len)
+        for start in range(0, len(ordered), self.batch_size):
+            batch = ordered[start:start + self.batch_size]
+            try:
+                results = nlp_pipeline(batch, max_length=chunker.model_max_length, truncation=True,
+                                       batch_size=len(batch))
+                for sentence, result in zip(batch, results):
+                    translations[sentence] = result['translation_text']
+            except Exception as e:
+                logger.warning(f"Failed to translate a batch of {len(batch)} sentences. Error: {e}")
+        return translations